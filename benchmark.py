@@ -0,0 +1,315 @@
+# =============================================================================
+# BENCHMARKS — PD e estruturas de dados da sprint
+# =============================================================================
+# Mede, em grades de parâmetros, os caminhos quentes de sprint4.py:
+#   • dp_topdown / dp_bottomup / dp_sliding_window: T × Smax × Qmax
+#     (tempo por fase via profilar=True, estados avaliados, stats do lru_cache);
+#   • simular_consumo: dias × tamanho do estoque (nº de registros gerados);
+#   • merge_sort / quick_sort / ordenar: nº de registros × distribuição da chave;
+#   • busca da opção 4 (IndiceBusca, com bisect) × busca sequencial: nº de
+#     registros × distribuição dos nomes de item;
+#   • dp_paralelo × nº de workers (escalonamento: speedup sobre
+#     dp_sliding_window, que é o que roda com 1 worker).
+# Para cada caso guarda tempo de parede (mínimo e mediana de N repetições, sem
+# tracemalloc ligado) e pico de memória (uma execução extra com tracemalloc).
+# O resultado é um JSON; com --baseline, cada caso é comparado ao mesmo caso
+# (mesmo nome e parâmetros) do arquivo de referência e o script sai com código 1
+# se algum ficar mais lento/pesado que (1 + limite) × referência.
+#
+#   python benchmark.py                          # grade completa
+#   python benchmark.py --rapido --apenas dp     # só os solvers, grade pequena
+#   python benchmark.py --saida base.json        # grava uma referência
+#   python benchmark.py --baseline base.json --limite 0.25
+
+from __future__ import annotations
+
+import argparse
+import copy
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import sprint4 as sp
+
+SAIDA_PADRAO = "bench_resultados.json"
+TEMPO_MINIMO = 1e-3  # abaixo disso (na referência) a razão de tempo é só ruído
+
+GRADES = {
+    "completa": {
+        "dp": {"T": (7, 30, 90), "Smax": (50, 200), "Qmax": (20, 100)},
+        "simulacao": {"dias": (7, 30, 180), "escala": (1, 20)},
+        "ordenacao": {"n": (1_000, 10_000, 50_000),
+                      "distribuicao": ("aleatoria", "ordenada", "invertida", "repetida")},
+        "busca": {"n": (1_000, 100_000), "distribuicao": ("uniforme", "zipf")},
+        "paralelo": {"T": (3,), "Smax": (20_000, 60_000), "Qmax": (2_000, 8_000),
+                     "workers": (1, 2, 4, 8, 16)},
+    },
+    "rapida": {
+        "dp": {"T": (7, 30), "Smax": (50,), "Qmax": (20,)},
+        "simulacao": {"dias": (7, 30), "escala": (1,)},
+        "ordenacao": {"n": (1_000, 10_000), "distribuicao": ("aleatoria", "repetida")},
+        "busca": {"n": (1_000,), "distribuicao": ("uniforme", "zipf")},
+        "paralelo": {"T": (2,), "Smax": (20_000,), "Qmax": (8_000,), "workers": (1, 2)},
+    },
+}
+
+# -------- Medição ---------------------------------------------------------------
+
+def medir(executar: Callable[..., Any], preparar: Callable[[], Tuple] = tuple,
+          repeticoes: int = 3) -> Tuple[Dict[str, Any], Any]:
+    # preparar() roda fora do cronômetro (ex.: cópia do estoque que a simulação altera)
+    tempos, resultado = [], None
+    for _ in range(repeticoes):
+        args = preparar()
+        inicio = time.perf_counter()
+        resultado = executar(*args)
+        tempos.append(time.perf_counter() - inicio)
+    args = preparar()
+    tracemalloc.start()
+    try:
+        executar(*args)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"tempo_s": min(tempos), "tempo_mediana_s": statistics.median(tempos),
+            "repeticoes": repeticoes, "pico_memoria_bytes": pico}, resultado
+
+
+def _grade(eixos: Dict[str, Tuple]) -> List[Dict[str, Any]]:
+    nomes = list(eixos)
+    return [dict(zip(nomes, valores)) for valores in itertools.product(*eixos.values())]
+
+# -------- Casos -----------------------------------------------------------------
+
+def bench_dp(grade: Dict[str, Tuple], repeticoes: int) -> List[Dict[str, Any]]:
+    casos = []
+    solvers = (sp.dp_topdown, sp.dp_bottomup, sp.dp_sliding_window)
+    for prm in _grade(grade):
+        T, Smax, Qmax = prm["T"], prm["Smax"], prm["Qmax"]
+        rng = random.Random(T * 1_000_003 + Smax * 1_009 + Qmax)
+        demandas = [rng.randint(0, max(1, Smax // 4)) for _ in range(T)]
+        params = sp.DPParams(Qmax=Qmax, Smax=Smax)
+        S0 = Smax // 2
+        for solver in solvers:
+            medidas, res = medir(lambda: solver(demandas, S0, params, profilar=True),
+                                 repeticoes=repeticoes)
+            medidas.update(
+                estados_avaliados=(res.estados_avaliados if res.estados_avaliados is not None
+                                   else T * (Smax + 1)),
+                cache_hits=res.cache_hits, cache_misses=res.cache_misses,
+                fases_s=res.tempos, custo_total=res.custo_total,
+            )
+            casos.append({"caso": solver.__name__, "params": prm, **medidas})
+    return casos
+
+
+def _estoque_escalado(escala: int) -> dict:
+    # réplicas do estoque da sprint com nomes distintos (escala × nº de SKUs)
+    if escala == 1:
+        return copy.deepcopy(sp.estoque)
+    return {f"{setor} {k}": copy.deepcopy(itens)
+            for k in range(escala) for setor, itens in sp.estoque.items()}
+
+
+def bench_simulacao(grade: Dict[str, Tuple], repeticoes: int) -> List[Dict[str, Any]]:
+    casos = []
+    for prm in _grade(grade):
+        base = _estoque_escalado(prm["escala"])
+        medidas, registros = medir(lambda est: sp.simular_consumo(est, dias=prm["dias"]),
+                                   lambda: (copy.deepcopy(base),), repeticoes)
+        medidas["n_registros"] = len(registros)
+        casos.append({"caso": "simular_consumo", "params": prm, **medidas})
+    return casos
+
+
+def _registros_sinteticos(n: int, distribuicao: str, semente: int = 7) -> List[sp.Consumo]:
+    rng = random.Random(semente)
+    if distribuicao == "aleatoria":
+        chaves = [rng.randint(0, n) for _ in range(n)]
+    elif distribuicao == "ordenada":
+        chaves = list(range(n))
+    elif distribuicao == "invertida":
+        chaves = list(range(n, 0, -1))
+    elif distribuicao == "repetida":
+        chaves = [rng.randint(0, 9) for _ in range(n)]
+    else:
+        raise ValueError(f"distribuição desconhecida: {distribuicao!r}")
+    hoje = date.today()
+    return [sp.Consumo(data=hoje + timedelta(days=i % 365), setor="Triagem", item="Luvas",
+                       quantidade_consumida=q, validade=hoje) for i, q in enumerate(chaves)]
+
+
+def bench_ordenacao(grade: Dict[str, Tuple], repeticoes: int) -> List[Dict[str, Any]]:
+    casos = []
+    chave = lambda r: r.quantidade_consumida
+    ordenadores = (("merge_sort", sp.merge_sort), ("quick_sort", sp.quick_sort),
+                   ("ordenar", sp.ordenar))
+    for prm in _grade(grade):
+        registros = _registros_sinteticos(prm["n"], prm["distribuicao"])
+        for nome, ordenador in ordenadores:
+            medidas, _ = medir(lambda: ordenador(registros, key=chave), repeticoes=repeticoes)
+            casos.append({"caso": nome, "params": prm, **medidas})
+    return casos
+
+
+def _registros_busca(n: int, distribuicao: str, n_itens: int = 500,
+                     semente: int = 11) -> Tuple[List[sp.Consumo], List[str]]:
+    rng = random.Random(semente)
+    itens = [f"Item {k:04d}" for k in range(n_itens)]
+    if distribuicao == "uniforme":
+        nomes = [rng.choice(itens) for _ in range(n)]
+    elif distribuicao == "zipf":  # poucos itens concentram a maior parte dos registros
+        pesos = [1 / (k + 1) for k in range(n_itens)]
+        nomes = rng.choices(itens, weights=pesos, k=n)
+    else:
+        raise ValueError(f"distribuição desconhecida: {distribuicao!r}")
+    hoje = date.today()
+    registros = [sp.Consumo(data=hoje + timedelta(days=i * 30 // n), setor="Triagem", item=nome,
+                            quantidade_consumida=1, validade=hoje)
+                 for i, nome in enumerate(nomes)]
+    return registros, itens
+
+
+def bench_busca(grade: Dict[str, Tuple], repeticoes: int,
+                n_consultas: int = 50) -> List[Dict[str, Any]]:
+    casos = []
+    for prm in _grade(grade):
+        registros, itens = _registros_busca(prm["n"], prm["distribuicao"])
+        rng = random.Random(prm["n"])
+        # metade das consultas acerta um item, metade não existe
+        consultas = [rng.choice(itens).lower() if k % 2 == 0 else f"ausente {k}"
+                     for k in range(n_consultas)]
+        medidas, indice = medir(lambda: sp.IndiceBusca(registros), repeticoes=repeticoes)
+        casos.append({"caso": "indice_construcao", "params": prm, **medidas})
+        for modo in ("sem_caixa", "prefixo"):
+            p = {**prm, "modo": modo, "consultas": n_consultas}
+            medidas, _ = medir(lambda: [indice.buscar(q, modo) for q in consultas],
+                               repeticoes=repeticoes)
+            casos.append({"caso": "busca_indice", "params": p, **medidas})
+            medidas, _ = medir(lambda: [sp.busca_sequencial(registros, q, modo) for q in consultas],
+                               repeticoes=repeticoes)
+            casos.append({"caso": "busca_sequencial", "params": p, **medidas})
+    return casos
+
+
+def bench_paralelo(grade: Dict[str, Tuple], repeticoes: int) -> List[Dict[str, Any]]:
+    # o pico de memória medido é só o do processo principal (os workers ficam de fora)
+    casos = []
+    serial: Dict[Tuple[int, int, int], float] = {}
+    for prm in _grade(grade):
+        T, Smax, Qmax, workers = prm["T"], prm["Smax"], prm["Qmax"], prm["workers"]
+        rng = random.Random(Smax + Qmax)
+        demandas = [rng.randint(0, Smax // 4) for _ in range(T)]
+        params = sp.DPParams(Qmax=Qmax, Smax=Smax)
+        medidas, _ = medir(lambda: sp.dp_paralelo(demandas, Smax // 2, params, n_workers=workers,
+                                                  limite_serial=0),
+                           repeticoes=repeticoes)
+        chave = (T, Smax, Qmax)
+        if workers == 1:
+            serial[chave] = medidas["tempo_s"]
+        if chave in serial:
+            medidas["speedup"] = serial[chave] / medidas["tempo_s"]
+            medidas["eficiencia"] = medidas["speedup"] / workers
+        medidas["nucleos"] = os.cpu_count()
+        casos.append({"caso": "dp_paralelo", "params": prm, **medidas})
+    return casos
+
+
+GRUPOS = {"dp": bench_dp, "simulacao": bench_simulacao,
+          "ordenacao": bench_ordenacao, "busca": bench_busca, "paralelo": bench_paralelo}
+
+# -------- Resultados e comparação com a referência ------------------------------
+
+def _chave_caso(caso: Dict[str, Any]) -> str:
+    return caso["caso"] + " " + json.dumps(caso["params"], sort_keys=True)
+
+
+def comparar(atual: Dict[str, Any], referencia: Dict[str, Any],
+             limite: float) -> List[Dict[str, Any]]:
+    # devolve uma linha por caso presente nos dois arquivos; "regressao" marca os
+    # que passaram de (1 + limite) × referência em tempo ou em pico de memória
+    base = {_chave_caso(c): c for c in referencia["casos"]}
+    linhas = []
+    for caso in atual["casos"]:
+        ref = base.get(_chave_caso(caso))
+        if ref is None:
+            continue
+        razao_tempo = (caso["tempo_s"] / ref["tempo_s"]
+                       if ref["tempo_s"] >= TEMPO_MINIMO else None)
+        razao_mem = (caso["pico_memoria_bytes"] / ref["pico_memoria_bytes"]
+                     if ref["pico_memoria_bytes"] else None)
+        regressao = any(r is not None and r > 1 + limite for r in (razao_tempo, razao_mem))
+        linhas.append({"caso": _chave_caso(caso), "razao_tempo": razao_tempo,
+                       "razao_memoria": razao_mem, "regressao": regressao})
+    return linhas
+
+
+def executar(grupos: List[str], grade: str, repeticoes: int) -> Dict[str, Any]:
+    casos = []
+    for nome in grupos:
+        inicio = time.perf_counter()
+        casos.extend(GRUPOS[nome](GRADES[grade][nome], repeticoes))
+        print(f"  {nome}: {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+    return {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "numpy": sp.np.__version__ if sp.np is not None else None,
+            "grade": grade, "repeticoes": repeticoes,
+        },
+        "casos": casos,
+    }
+
+
+def _fmt_razao(r: Optional[float]) -> str:
+    return "   —  " if r is None else f"{r:6.2f}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmarks da PD e das estruturas de dados.")
+    ap.add_argument("--rapido", action="store_true", help="grade reduzida")
+    ap.add_argument("--apenas", default=",".join(GRUPOS),
+                    help=f"grupos separados por vírgula ({', '.join(GRUPOS)})")
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--saida", default=SAIDA_PADRAO, help="arquivo JSON de resultados")
+    ap.add_argument("--baseline", help="JSON de referência para detectar regressões")
+    ap.add_argument("--limite", type=float, default=0.20,
+                    help="regressão se atual > (1 + limite) × referência (padrão 0.20)")
+    args = ap.parse_args(argv)
+
+    grupos = [g.strip() for g in args.apenas.split(",") if g.strip()]
+    desconhecidos = [g for g in grupos if g not in GRUPOS]
+    if desconhecidos:
+        ap.error(f"grupo(s) desconhecido(s): {', '.join(desconhecidos)}")
+
+    resultado = executar(grupos, "rapida" if args.rapido else "completa", args.repeticoes)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"{len(resultado['casos'])} casos gravados em {args.saida}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        referencia = json.load(f)
+    linhas = comparar(resultado, referencia, args.limite)
+    print(f"\nComparação com {args.baseline} (limite +{args.limite:.0%}):")
+    print(" tempo   memória  caso")
+    for ln in linhas:
+        marca = "  << REGRESSÃO" if ln["regressao"] else ""
+        print(f"{_fmt_razao(ln['razao_tempo'])}  {_fmt_razao(ln['razao_memoria'])}  {ln['caso']}{marca}")
+    regressoes = sum(ln["regressao"] for ln in linhas)
+    print(f"{len(linhas)} casos comparados, {regressoes} regressão(ões).")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
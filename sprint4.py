@@ -7,21 +7,48 @@
 #  2) Duas implementações da PD
 #       a) Versão recursiva com memoização (top‑down)
 #       b) Versão iterativa (bottom‑up)
+#       c) Versão iterativa com janela deslizante, O(T·Smax)
+#       d) Versão top‑down sem recursão, só com estados alcançáveis
 #     e verificação de equivalência (15 pts)
 #  3) Mantém as partes já pedidas (Fila, Pilha, Buscas, Ordenações) e
 #     amplia o RELATÓRIO incluindo a modelagem da PD e os resultados.
 # =============================================================================
 
 from __future__ import annotations
-from collections import deque
-from dataclasses import dataclass
+from array import array
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from dataclasses import dataclass, astuple
 from datetime import date, timedelta
 from functools import lru_cache
-from typing import List, Tuple, Dict, Callable, Any, Optional
+from typing import List, Tuple, Dict, Callable, Any, Optional, Iterable, Iterator
+import csv
+import bisect
+import shutil
+import hashlib
+import heapq
+import itertools
+import json
+import mmap
+import math
+import operator
+import struct
 import random
 import textwrap
+import time
 import os
 
+try:  # NumPy é opcional: só os backends vetorizados dependem dele
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _exigir_numpy():
+    if np is None:
+        raise RuntimeError("Este modo requer NumPy (pip install numpy).")
+
 # =============================================================================
 # DADOS INICIAIS DO ESTOQUE HOSPITALAR (mesmo dataset da sprint)
 # =============================================================================
@@ -49,6 +76,7 @@ def str_to_date(yyyy_mm_dd: str) -> date:
 
 @dataclass
 class Consumo:
+    __slots__ = ("data", "setor", "item", "quantidade_consumida", "validade")
     data: date
     setor: str
     item: str
@@ -61,38 +89,18 @@ class Consumo:
             f"consumido={self.quantidade_consumida} | validade={self.validade}"
         )
 
-class FilaConsumo:
-    def __init__(self):
-        self._fila = deque()
-    def enfileirar(self, c: Consumo):
-        self._fila.append(c)
-    def desenfileirar(self) -> Optional[Consumo]:
-        return self._fila.popleft() if self._fila else None
-    def listar(self) -> List[Consumo]:
-        return list(self._fila)
-    def __len__(self):
-        return len(self._fila)
-
-class PilhaConsumo:
-    def __init__(self):
-        self._pilha: List[Consumo] = []
-    def empilhar(self, c: Consumo):
-        self._pilha.append(c)
-    def desempilhar(self) -> Optional[Consumo]:
-        return self._pilha.pop() if self._pilha else None
-    def listar(self) -> List[Consumo]:
-        return list(reversed(self._pilha))
-    def __len__(self):
-        return len(self._pilha)
-
 # =============================================================================
 # SIMULAÇÃO DE CONSUMO (mesma base da sprint)
 # =============================================================================
 
 def simular_consumo(estoque: dict, dias: int = 7, semente: int = 42) -> List[Consumo]:
+    return list(simular_consumo_stream(estoque, dias=dias, semente=semente))
+
+
+def simular_consumo_stream(estoque: dict, dias: int = 7, semente: int = 42) -> Iterator[Consumo]:
+    # mesma simulação, entregando um registro por vez (ingestão em streaming)
     random.seed(semente)
     hoje = date.today()
-    registros: List[Consumo] = []
     for d in range(dias):
         data_atual = hoje + timedelta(days=d)
         for setor, itens in estoque.items():
@@ -105,20 +113,238 @@ def simular_consumo(estoque: dict, dias: int = 7, semente: int = 42) -> List[Con
                 consumido = min(consumido, dados["quantidade"])  # não estoura
                 dados["quantidade"] -= consumido
                 if consumido > 0:
-                    registros.append(
-                        Consumo(
-                            data=data_atual,
-                            setor=setor,
-                            item=item,
-                            quantidade_consumida=consumido,
-                            validade=str_to_date(dados["validade"]),
-                        )
+                    yield Consumo(
+                        data=data_atual,
+                        setor=setor,
+                        item=item,
+                        quantidade_consumida=consumido,
+                        validade=str_to_date(dados["validade"]),
                     )
+
+# -------- Simulação vetorizada (N cenários de uma vez) --------------------------
+# Mesma regra de simular_consumo (consumo diário sorteado em [0, max(1, 10% do
+# estoque atual)], limitado ao que resta; itens zerados deixam de consumir),
+# mas os N cenários × SKUs de cada dia saem de um único sorteio do Generator do
+# NumPy. O estoque original não é alterado: o estoque final de cada cenário vem
+# em `estoque_final`. A saída é colunar (um array por campo), ordenada por
+# (cenário, dia, setor, item) como a lista de simular_consumo.
+
+@dataclass
+class ConsumoColunar:
+    cenario: Any         # int32
+    dia: Any             # int32, dias desde data_inicial
+    setor_id: Any        # int32, índice em setores
+    item_id: Any         # int32, índice em itens
+    quantidade: Any      # int64
+    validade_ord: Any    # int32, date.toordinal()
+    setores: List[str]
+    itens: List[str]
+    data_inicial: date
+    estoque_final: Any   # (N, SKUs) na ordem de estoque[setor][item]
+
+    def __len__(self):
+        return len(self.quantidade)
+
+
+def simular_consumo_lote(estoque: dict, dias: int = 7, n_cenarios: int = 1,
+                         semente: int = 42) -> ConsumoColunar:
+    _exigir_numpy()
+    rng = np.random.default_rng(semente)
+    setores = list(estoque.keys())
+    itens: List[str] = []
+    item_idx: Dict[str, int] = {}
+    sku_setor, sku_item, sku_qtd, sku_val = [], [], [], []
+    for i_setor, (setor, its) in enumerate(estoque.items()):
+        for item, dados in its.items():
+            if item not in item_idx:
+                item_idx[item] = len(itens)
+                itens.append(item)
+            sku_setor.append(i_setor)
+            sku_item.append(item_idx[item])
+            sku_qtd.append(dados["quantidade"])
+            sku_val.append(str_to_date(dados["validade"]).toordinal())
+    sku_setor_a = np.array(sku_setor, dtype=np.int32)
+    sku_item_a = np.array(sku_item, dtype=np.int32)
+    sku_val_a = np.array(sku_val, dtype=np.int32)
+    qtd = np.tile(np.array(sku_qtd, dtype=np.int64), (n_cenarios, 1))
+
+    blocos_cen, blocos_dia, blocos_sku, blocos_qtd = [], [], [], []
+    for d in range(dias):
+        max_consumo = np.maximum(1, (qtd * 0.10).astype(np.int64))
+        consumido = rng.integers(0, max_consumo + 1)
+        consumido = np.where(qtd > 0, np.minimum(consumido, qtd), 0)
+        qtd -= consumido
+        cen, sku = np.nonzero(consumido)
+        blocos_cen.append(cen.astype(np.int32))
+        blocos_dia.append(np.full(len(cen), d, dtype=np.int32))
+        blocos_sku.append(sku)
+        blocos_qtd.append(consumido[cen, sku])
+
+    def juntar(blocos, dtype):
+        return np.concatenate(blocos).astype(dtype) if blocos else np.empty(0, dtype=dtype)
+
+    cen_a = juntar(blocos_cen, np.int32)
+    ordem = np.argsort(cen_a, kind="stable")  # cada dia já vem ordenado por (cenário, SKU)
+    sku_a = juntar(blocos_sku, np.int64)[ordem]
+    return ConsumoColunar(
+        cenario=cen_a[ordem], dia=juntar(blocos_dia, np.int32)[ordem],
+        setor_id=sku_setor_a[sku_a], item_id=sku_item_a[sku_a],
+        quantidade=juntar(blocos_qtd, np.int64)[ordem], validade_ord=sku_val_a[sku_a],
+        setores=setores, itens=itens, data_inicial=date.today(), estoque_final=qtd,
+    )
+
+
+def colunar_para_consumos(col: ConsumoColunar, cenario: int = 0) -> List[Consumo]:
+    _exigir_numpy()
+    sel = np.nonzero(col.cenario == cenario)[0]
+    datas: Dict[int, date] = {}
+    validades: Dict[int, date] = {}
+    registros: List[Consumo] = []
+    for dia, setor, item, qtd, val in zip(col.dia[sel].tolist(), col.setor_id[sel].tolist(),
+                                          col.item_id[sel].tolist(), col.quantidade[sel].tolist(),
+                                          col.validade_ord[sel].tolist()):
+        if dia not in datas:
+            datas[dia] = col.data_inicial + timedelta(days=dia)
+        if val not in validades:
+            validades[val] = date.fromordinal(val)
+        registros.append(Consumo(data=datas[dia], setor=col.setores[setor], item=col.itens[item],
+                                 quantidade_consumida=qtd, validade=validades[val]))
     return registros
 
+# =============================================================================
+# REGISTROS EM ARRAYS (ConsumoStore)
+# =============================================================================
+# Os registros ficam em colunas tipadas (array) com setor e item internados em
+# ids inteiros; um Consumo só é materializado quando alguém lê o registro.
+# Fila (FIFO) e Pilha (LIFO) viram faixas de índices (range) sobre as colunas,
+# sem cópia. Índices mantidos a cada inserção:
+#   • hash por item e por setor → lista de posições, consulta O(1);
+#   • ordenado por data → consulta por intervalo de datas em O(log n).
+# demandas_por_dia() soma a quantidade agrupada por dia no mesmo calendário denso
+# da função demandas_por_dia(registros) (dias sem consumo valem 0).
+
+class VisaoConsumo:
+    def __init__(self, store: "ConsumoStore", indices):
+        self._store = store
+        self._indices = indices  # range ou array de posições
+
+    def __len__(self):
+        return len(self._indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return VisaoConsumo(self._store, self._indices[i])
+        return self._store.registro(self._indices[i])
+
+    def __iter__(self):
+        registro = self._store.registro
+        return (registro(i) for i in self._indices)
+
+    def listar(self) -> List[Consumo]:
+        return list(self)
+
+
+class ConsumoStore:
+    def __init__(self):
+        self.setores: List[str] = []
+        self.itens: List[str] = []
+        self._setor_id: Dict[str, int] = {}
+        self._item_id: Dict[str, int] = {}
+        self._dia = array("i")       # date.toordinal()
+        self._setor = array("i")
+        self._item = array("i")
+        self._qtd = array("q")
+        self._validade = array("i")  # date.toordinal()
+        self._por_item: Dict[int, array] = {}
+        self._por_setor: Dict[int, array] = {}
+        self._datas_ord = array("i")  # dias em ordem crescente
+        self._idx_ord = array("i")    # posição do registro correspondente
+
+    @classmethod
+    def de_registros(cls, registros) -> "ConsumoStore":
+        store = cls()
+        store.estender(registros)
+        return store
+
+    def _internar(self, nome: str, ids: Dict[str, int], nomes: List[str]) -> int:
+        i = ids.get(nome)
+        if i is None:
+            i = ids[nome] = len(nomes)
+            nomes.append(nome)
+        return i
+
+    def adicionar(self, c: Consumo):
+        pos = len(self._qtd)
+        dia = c.data.toordinal()
+        setor = self._internar(c.setor, self._setor_id, self.setores)
+        item = self._internar(c.item, self._item_id, self.itens)
+        self._dia.append(dia)
+        self._setor.append(setor)
+        self._item.append(item)
+        self._qtd.append(c.quantidade_consumida)
+        self._validade.append(c.validade.toordinal())
+        self._por_item.setdefault(item, array("i")).append(pos)
+        self._por_setor.setdefault(setor, array("i")).append(pos)
+        if not self._datas_ord or self._datas_ord[-1] <= dia:
+            self._datas_ord.append(dia)
+            self._idx_ord.append(pos)
+        else:  # fora de ordem: insere mantendo a estabilidade por posição
+            k = bisect.bisect_right(self._datas_ord, dia)
+            self._datas_ord.insert(k, dia)
+            self._idx_ord.insert(k, pos)
+
+    def estender(self, registros):
+        for c in registros:
+            self.adicionar(c)
+
+    def __len__(self):
+        return len(self._qtd)
+
+    def registro(self, i: int) -> Consumo:
+        return Consumo(data=date.fromordinal(self._dia[i]), setor=self.setores[self._setor[i]],
+                       item=self.itens[self._item[i]], quantidade_consumida=self._qtd[i],
+                       validade=date.fromordinal(self._validade[i]))
+
+    def fila(self) -> VisaoConsumo:
+        return VisaoConsumo(self, range(len(self)))
+
+    def pilha(self) -> VisaoConsumo:
+        return VisaoConsumo(self, range(len(self)-1, -1, -1))
+
+    def por_item(self, item: str) -> VisaoConsumo:
+        i = self._item_id.get(item)
+        return VisaoConsumo(self, self._por_item[i] if i is not None else range(0))
+
+    def por_setor(self, setor: str) -> VisaoConsumo:
+        i = self._setor_id.get(setor)
+        return VisaoConsumo(self, self._por_setor[i] if i is not None else range(0))
+
+    def entre_datas(self, inicio: date, fim: date) -> VisaoConsumo:
+        # registros com inicio <= data <= fim, em ordem de data
+        lo = bisect.bisect_left(self._datas_ord, inicio.toordinal())
+        hi = bisect.bisect_right(self._datas_ord, fim.toordinal())
+        return VisaoConsumo(self, self._idx_ord[lo:hi])
+
+    def demandas_por_dia(self) -> List[int]:
+        if not self._qtd: return []
+        dia0, dia1 = self._datas_ord[0], self._datas_ord[-1]
+        if np is not None:
+            dias = np.frombuffer(self._datas_ord, dtype=np.int32)
+            qtd = np.frombuffer(self._qtd, dtype=np.int64)[np.frombuffer(self._idx_ord, dtype=np.int32)]
+            inicios = np.flatnonzero(np.r_[True, dias[1:] != dias[:-1]])
+            denso = np.zeros(dia1 - dia0 + 1, dtype=np.int64)
+            denso[dias[inicios] - dia0] = np.add.reduceat(qtd, inicios)
+            return denso.tolist()
+        denso = [0]*(dia1 - dia0 + 1)
+        for dia, qtd in zip(self._dia, self._qtd):
+            denso[dia - dia0] += qtd
+        return denso
+
 # =============================================================================
 # BUSCAS E ORDENAÇÕES (resumo — iguais à sprint anterior)
 # =============================================================================
+# merge_sort/quick_sort ficam como referência (benchmark.py compara com ordenar);
+# o menu usa top_k e ordenar, mais abaixo.
 
 def merge_sort(arr: List[Any], key: Callable[[Any], Any]) -> List[Any]:
     if len(arr) <= 1: return arr[:]
@@ -140,6 +366,572 @@ def quick_sort(arr: List[Any], key: Callable[[Any], Any]) -> List[Any]:
     maiores = [x for x in arr if key(x) > p]
     return quick_sort(menores, key) + iguais + quick_sort(maiores, key)
 
+# -------- Motor de ordenação com chave calculada uma vez + top-k -----------------
+# merge_sort chama key(...) duas vezes por comparação e fatia a lista em todo
+# nível; quick_sort faz três list comprehensions por partição e recursão sem
+# limite (chaves repetidas degeneram). Aqui:
+#   • cada chave é calculada uma única vez;
+#   • ordena-se um vetor de índices com merge sort iterativo bottom-up (sem
+#     recursão), estável também em ordem decrescente;
+#   • top_k usa heap (heapq) em O(n log k), para quando só os k primeiros
+#     interessam (a opção 5 mostra 10).
+
+def ordenar_indices(chaves: List[Any], reverse: bool = False) -> List[int]:
+    n = len(chaves)
+    antes = operator.ge if reverse else operator.le  # empate: fica o da esquerda
+    idx, buf = list(range(n)), [0]*n
+    largura = 1
+    while largura < n:
+        for ini in range(0, n, 2*largura):
+            meio, fim = min(ini + largura, n), min(ini + 2*largura, n)
+            i, j, k = ini, meio, ini
+            while i < meio and j < fim:
+                if antes(chaves[idx[i]], chaves[idx[j]]):
+                    buf[k] = idx[i]; i += 1
+                else:
+                    buf[k] = idx[j]; j += 1
+                k += 1
+            buf[k:k + meio - i] = idx[i:meio]; k += meio - i
+            buf[k:k + fim - j] = idx[j:fim]
+        idx, buf = buf, idx
+        largura *= 2
+    return idx
+
+
+def ordenar(registros: List[Any], key: Callable[[Any], Any], reverse: bool = False) -> List[Any]:
+    chaves = [key(r) for r in registros]
+    return [registros[i] for i in ordenar_indices(chaves, reverse)]
+
+
+def top_k(registros: List[Any], key: Callable[[Any], Any], k: int,
+          reverse: bool = False) -> List[Any]:
+    # mesmo resultado de ordenar(registros, key, reverse)[:k]
+    return heapq.nlargest(k, registros, key=key) if reverse else heapq.nsmallest(k, registros, key=key)
+
+# -------- Índice de busca persistente (opção 4) ---------------------------------
+# No lugar de reordenar tudo com merge_sort a cada consulta, o índice se apoia
+# no ConsumoStore: as posições de cada item já estão no hash por id internado do
+# store, e o índice só acrescenta o que o store não tem:
+#   • exato: id do item no store → posições, O(1);
+#   • sem caixa: nome em minúsculas → ids do store (variações de caixa), O(1);
+#   • prefixo: busca binária na lista ordenada de nomes (sem caixa);
+#   • item + setor + intervalo de datas: busca binária nas datas de cada id (se
+#     chegaram em ordem cronológica) e filtro por setor só nessa fatia.
+# O índice não entra na ingestão: ele acompanha o store sob demanda, olhando só
+# os itens e as posições novos desde a última consulta. Todas as buscas
+# devolvem os registros na ordem de chegada, ou seja, exatamente o que a busca
+# sequencial devolve (ver conferir_busca()).
+
+class IndiceBusca:
+    def __init__(self, store: Any = ()):
+        # store: ConsumoStore compartilhado, ou registros para um store próprio
+        self.store = store if isinstance(store, ConsumoStore) else ConsumoStore.de_registros(store)
+        self._n_itens = 0                    # itens do store já vistos
+        self._minusc: Dict[str, List[int]] = {}
+        self._chaves: List[str] = []         # nomes em minúsculas, ordenados
+        self._dias: Dict[int, array] = {}    # id do item → datas, alinhadas às posições
+        self._ordenado: Dict[int, bool] = {}
+
+    def __len__(self):
+        return len(self.store)
+
+    def adicionar(self, r: Consumo):
+        self.store.adicionar(r)
+
+    def estender(self, registros):
+        self.store.estender(registros)
+
+    def _sincronizar(self):
+        itens = self.store.itens
+        for i in range(self._n_itens, len(itens)):
+            chave = itens[i].lower()
+            ids = self._minusc.get(chave)
+            if ids is None:
+                self._minusc[chave] = [i]
+                bisect.insort(self._chaves, chave)
+            else:
+                ids.append(i)
+        self._n_itens = len(itens)
+
+    def _dias_item(self, i: int) -> array:
+        posicoes = self.store._por_item[i]
+        dias = self._dias.setdefault(i, array("i"))
+        ordenado = self._ordenado.get(i, True)
+        for k in range(len(dias), len(posicoes)):
+            dia = self.store._dia[posicoes[k]]
+            if dias and dias[-1] > dia:
+                ordenado = False
+            dias.append(dia)
+        self._ordenado[i] = ordenado
+        return dias
+
+    def _juntar(self, ids: List[int]) -> List[int]:
+        por_item = self.store._por_item
+        if len(ids) == 1:
+            return list(por_item[ids[0]])
+        return sorted(p for i in ids for p in por_item[i])
+
+    def _posicoes(self, item: str, modo: str) -> List[int]:
+        self._sincronizar()
+        if modo == "exato":
+            i = self.store._item_id.get(item)
+            return list(self.store._por_item[i]) if i is not None else []
+        alvo = item.lower()
+        if modo == "sem_caixa":
+            return self._juntar(self._minusc.get(alvo, []))
+        if modo == "prefixo":
+            k = bisect.bisect_left(self._chaves, alvo)
+            ids = []
+            while k < len(self._chaves) and self._chaves[k].startswith(alvo):
+                ids.extend(self._minusc[self._chaves[k]])
+                k += 1
+            return self._juntar(ids)
+        raise ValueError(f"modo de busca desconhecido: {modo!r}")
+
+    def buscar(self, item: str, modo: str = "sem_caixa") -> List[Consumo]:
+        # modo: "exato", "sem_caixa" ou "prefixo"
+        return [self.store.registro(p) for p in self._posicoes(item, modo)]
+
+    def consultar(self, item: str, setor: Optional[str] = None,
+                  inicio: Optional[date] = None, fim: Optional[date] = None) -> List[Consumo]:
+        # item e setor sem diferenciar maiúsculas; datas inclusivas
+        self._sincronizar()
+        ini_ord = inicio.toordinal() if inicio else None
+        fim_ord = fim.toordinal() if fim else None
+        setores = None
+        if setor is not None:
+            setor_l = setor.lower()
+            setores = {i for i, nome in enumerate(self.store.setores) if nome.lower() == setor_l}
+        col_setor = self.store._setor
+        out = []
+        for i in self._minusc.get(item.lower(), []):
+            posicoes, dias = self.store._por_item[i], self._dias_item(i)
+            lo, hi = 0, len(posicoes)
+            if self._ordenado[i]:
+                if ini_ord is not None: lo = bisect.bisect_left(dias, ini_ord)
+                if fim_ord is not None: hi = bisect.bisect_right(dias, fim_ord)
+            for k in range(lo, hi):
+                dia = dias[k]
+                if (ini_ord is not None and dia < ini_ord) or (fim_ord is not None and dia > fim_ord):
+                    continue
+                if setores is None or col_setor[posicoes[k]] in setores:
+                    out.append(posicoes[k])
+        out.sort()
+        return [self.store.registro(p) for p in out]
+
+
+def busca_sequencial(registros: List[Consumo], item: str, modo: str = "sem_caixa",
+                     setor: Optional[str] = None, inicio: Optional[date] = None,
+                     fim: Optional[date] = None) -> List[Consumo]:
+    alvo = item.lower()
+    if modo == "exato": casa = lambda r: r.item == item
+    elif modo == "sem_caixa": casa = lambda r: r.item.lower() == alvo
+    elif modo == "prefixo": casa = lambda r: r.item.lower().startswith(alvo)
+    else: raise ValueError(f"modo de busca desconhecido: {modo!r}")
+    return [r for r in registros if casa(r)
+            and (setor is None or r.setor.lower() == setor.lower())
+            and (inicio is None or r.data >= inicio) and (fim is None or r.data <= fim)]
+
+
+def conferir_busca(indice: IndiceBusca, registros: List[Consumo], item: str,
+                   modo: str = "sem_caixa", setor: Optional[str] = None,
+                   inicio: Optional[date] = None, fim: Optional[date] = None) -> bool:
+    # confere buscar() no modo pedido e consultar() com o filtro item+setor+datas
+    return (indice.buscar(item, modo) == busca_sequencial(registros, item, modo)
+            and indice.consultar(item, setor, inicio, fim)
+            == busca_sequencial(registros, item, "sem_caixa", setor, inicio, fim))
+
+# =============================================================================
+# INGESTÃO EM STREAMING E AGREGAÇÃO INCREMENTAL DA DEMANDA
+# =============================================================================
+# Registros chegam um a um ou em lotes (gerador da simulação, arquivo CSV...) e
+# são repassados aos destinos: lista de registros, ConsumoStore (que o
+# IndiceBusca acompanha sozinho) e AgregadorDemanda. O agregador mantém, em O(1) por registro, o total por dia
+# (vetor denso do primeiro ao último dia, com os dias sem consumo valendo 0),
+# por setor e por item, e a série diária de cada (setor, item) no mesmo
+# calendário — os vetores de demanda da PD (consolidado e por SKU) saem prontos,
+# sem reagrupar nem reordenar os registros (e sem encurtar o horizonte nos dias
+# zerados).
+
+class AgregadorDemanda:
+    def __init__(self):
+        self.dia_inicial: Optional[date] = None
+        self._por_dia = array("q")
+        self._por_sku: Dict[Tuple[str, str], array] = {}  # séries do dia_inicial até o último consumo do SKU
+        self.por_setor: Dict[str, int] = {}
+        self.por_item: Dict[str, int] = {}
+        self.n_registros = 0
+
+    def adicionar(self, r: Consumo):
+        dia = r.data.toordinal()
+        if self.dia_inicial is None:
+            self.dia_inicial = r.data
+        i = dia - self.dia_inicial.toordinal()
+        if i < 0:  # registro anterior ao primeiro dia: desloca os vetores
+            zeros = array("q", [0]) * -i
+            self._por_dia[0:0] = zeros
+            for serie in self._por_sku.values():
+                serie[0:0] = zeros
+            self.dia_inicial, i = r.data, 0
+        elif i >= len(self._por_dia):
+            self._por_dia.extend(array("q", [0]) * (i - len(self._por_dia) + 1))
+        q = r.quantidade_consumida
+        self._por_dia[i] += q
+        serie = self._por_sku.get((r.setor, r.item))
+        if serie is None:
+            serie = self._por_sku[(r.setor, r.item)] = array("q")
+        if i >= len(serie):
+            serie.extend(array("q", [0]) * (i - len(serie) + 1))
+        serie[i] += q
+        self.por_setor[r.setor] = self.por_setor.get(r.setor, 0) + q
+        self.por_item[r.item] = self.por_item.get(r.item, 0) + q
+        self.n_registros += 1
+
+    def estender(self, registros: Iterable[Consumo]):
+        for r in registros:
+            self.adicionar(r)
+
+    @classmethod
+    def de_log(cls, log: "LeitorLog") -> "AgregadorDemanda":
+        # mesmos totais de estender(log), direto das colunas mapeadas do log
+        # (sem criar um Consumo por linha)
+        ag = cls()
+        if not len(log):
+            return ag
+        if np is None:
+            ag.estender(log)
+            return ag
+        dias, setor, item = log.coluna("dia"), log.coluna("setor"), log.coluna("item")
+        qtd = log.coluna("quantidade")
+        dia0 = int(dias.min())
+        ag.dia_inicial = date.fromordinal(dia0)
+        ag._por_dia = array("q", log.demandas_por_dia())
+        for nomes, ids, totais in ((log.setores, setor, ag.por_setor), (log.itens, item, ag.por_item)):
+            presentes = np.bincount(ids, minlength=len(nomes))
+            # pesos em float64 são exatos enquanto cada total < 2**53
+            somas = np.bincount(ids, weights=qtd, minlength=len(nomes)).astype(np.int64)
+            for i in np.flatnonzero(presentes).tolist():
+                totais[nomes[i]] = int(somas[i])
+        # séries por SKU: ordena por (sku, dia) e soma cada segmento num vetor denso
+        sku = setor.astype(np.int64)*len(log.itens) + item
+        rel = (dias - dia0).astype(np.int64)
+        ordem = np.lexsort((rel, sku))
+        sku, rel, q = sku[ordem], rel[ordem], qtd[ordem]
+        cortes = np.flatnonzero(np.r_[True, sku[1:] != sku[:-1], True])
+        for a, b in zip(cortes[:-1].tolist(), cortes[1:].tolist()):
+            serie = np.zeros(int(rel[b-1]) + 1, dtype=np.int64)
+            np.add.at(serie, rel[a:b], q[a:b])
+            s_id, i_id = divmod(int(sku[a]), len(log.itens))
+            ag._por_sku[(log.setores[s_id], log.itens[i_id])] = array("q", serie.tobytes())
+        ag.n_registros = len(log)
+        return ag
+
+    def demandas(self) -> List[int]:
+        return self._por_dia.tolist()
+
+    def demandas_por_sku(self) -> Dict[Tuple[str, str], List[int]]:
+        # séries por (setor, item), todas com o horizonte de demandas()
+        T = len(self._por_dia)
+        return {sku: serie.tolist() + [0]*(T - len(serie)) for sku, serie in self._por_sku.items()}
+
+    def dias(self) -> List[date]:
+        if self.dia_inicial is None: return []
+        return [self.dia_inicial + timedelta(days=i) for i in range(len(self._por_dia))]
+
+
+class PipelineIngestao:
+    def __init__(self, registros: Optional[List[Consumo]] = None,
+                 store: Optional[ConsumoStore] = None,
+                 agregador: Optional[AgregadorDemanda] = None):
+        self.registros = registros
+        self.destinos = [d for d in (store, agregador) if d is not None]
+
+    def ingerir(self, r: Consumo):
+        if self.registros is not None:
+            self.registros.append(r)
+        for destino in self.destinos:
+            destino.adicionar(r)
+
+    def ingerir_lote(self, fonte: Iterable[Any], tamanho_lote: int = 10_000) -> int:
+        # fonte: registros soltos ou lotes (listas) de registros; lê em blocos
+        # de tamanho_lote para não materializar a fonte inteira
+        planos = itertools.chain.from_iterable(
+            x if isinstance(x, (list, tuple)) else (x,) for x in fonte)
+        total = 0
+        while True:
+            lote = list(itertools.islice(planos, tamanho_lote))
+            if not lote:
+                return total
+            if self.registros is not None:
+                self.registros.extend(lote)
+            for destino in self.destinos:
+                destino.estender(lote)
+            total += len(lote)
+
+
+CAMPOS_CSV = ("data", "setor", "item", "quantidade_consumida", "validade")
+
+
+def ler_consumos_csv(caminho: str) -> Iterator[Consumo]:
+    with open(caminho, newline="", encoding="utf-8") as f:
+        for linha in csv.DictReader(f, delimiter=";"):
+            yield Consumo(data=str_to_date(linha["data"]), setor=linha["setor"],
+                          item=linha["item"],
+                          quantidade_consumida=int(linha["quantidade_consumida"]),
+                          validade=str_to_date(linha["validade"]))
+
+
+def salvar_consumos_csv(registros: Iterable[Consumo], caminho: str):
+    with open(caminho, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(CAMPOS_CSV)
+        for r in registros:
+            w.writerow((r.data.isoformat(), r.setor, r.item, r.quantidade_consumida,
+                        r.validade.isoformat()))
+
+# =============================================================================
+# LOG DE CONSUMO EM DISCO (append-only, leitura por mmap)
+# =============================================================================
+# Pasta com:
+#   registros.bin   cabeçalho de 16 bytes + linhas fixas de 24 bytes
+#                   (dia ordinal i32, setor_id i32, item_id i32, quantidade i64,
+#                   validade ordinal i32), só acrescentadas no fim;
+#   setores.txt     tabela de strings internadas (um nome JSON por linha; a
+#   itens.txt       linha é o id), gravada antes das linhas que a usam;
+#   indice_item.bin / indice_dia.bin
+#                   índices CSR (offsets + posições) por item e por dia.
+# A escrita é em blocos, com fsync a cada `fsync_a_cada` linhas. A leitura faz
+# mmap do arquivo e expõe as colunas como visões NumPy sem cópia, então reabrir
+# um histórico grande custa só ler as tabelas de strings. Uma linha incompleta
+# no fim (queda no meio da escrita) é ignorada.
+
+MAGICO_LOG = b"CONSLOG1"
+CABECALHO_LOG = struct.Struct("<8sII")  # mágico, versão, tamanho da linha
+LINHA_LOG = struct.Struct("<iiiqi")
+MAGICO_IDX = b"CONSIDX1"
+CABECALHO_IDX = struct.Struct("<8sQqQ")  # mágico, linhas indexadas, primeira chave, nº de chaves
+
+
+def _dtype_log():
+    return np.dtype([("dia", "<i4"), ("setor", "<i4"), ("item", "<i4"),
+                     ("quantidade", "<i8"), ("validade", "<i4")])
+
+
+def _ler_tabela_strings(caminho: str) -> List[str]:
+    if not os.path.exists(caminho): return []
+    with open(caminho, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f if linha.endswith("\n")]
+
+
+class LogConsumo:
+    def __init__(self, pasta: str, fsync_a_cada: int = 100_000, tamanho_lote: int = 10_000):
+        os.makedirs(pasta, exist_ok=True)
+        self.pasta = pasta
+        self.fsync_a_cada = fsync_a_cada
+        self.tamanho_lote = tamanho_lote
+        self._nomes: Dict[str, Dict[str, int]] = {}
+        self._arq_nomes: Dict[str, Any] = {}
+        for tabela in ("setores", "itens"):
+            caminho = os.path.join(pasta, f"{tabela}.txt")
+            self._nomes[tabela] = {n: i for i, n in enumerate(_ler_tabela_strings(caminho))}
+            self._arq_nomes[tabela] = open(caminho, "a", encoding="utf-8")
+        caminho = os.path.join(pasta, "registros.bin")
+        novo = not os.path.exists(caminho) or os.path.getsize(caminho) < CABECALHO_LOG.size
+        if not novo:  # descarta uma linha incompleta deixada por uma queda
+            excesso = (os.path.getsize(caminho) - CABECALHO_LOG.size) % LINHA_LOG.size
+            if excesso:
+                os.truncate(caminho, os.path.getsize(caminho) - excesso)
+        self._arq = open(caminho, "ab")
+        if novo:
+            self._arq.truncate(0)
+            self._arq.write(CABECALHO_LOG.pack(MAGICO_LOG, 1, LINHA_LOG.size))
+        self._buffer = bytearray()
+        self._desde_fsync = 0
+
+    def _id(self, tabela: str, nome: str) -> int:
+        ids = self._nomes[tabela]
+        i = ids.get(nome)
+        if i is None:
+            i = ids[nome] = len(ids)
+            self._arq_nomes[tabela].write(json.dumps(nome, ensure_ascii=False) + "\n")
+        return i
+
+    def adicionar(self, r: Consumo):
+        self._buffer += LINHA_LOG.pack(r.data.toordinal(), self._id("setores", r.setor),
+                                       self._id("itens", r.item), r.quantidade_consumida,
+                                       r.validade.toordinal())
+        if len(self._buffer) >= self.tamanho_lote * LINHA_LOG.size:
+            self._descarregar()
+
+    def estender(self, registros: Iterable[Consumo]):
+        for r in registros:
+            self.adicionar(r)
+
+    def _descarregar(self, forcar_fsync: bool = False):
+        # strings antes das linhas: nenhuma linha no disco aponta para um id ausente
+        for f in self._arq_nomes.values():
+            f.flush()
+        fsync = forcar_fsync or self._desde_fsync + len(self._buffer)//LINHA_LOG.size >= self.fsync_a_cada
+        if fsync:
+            for f in self._arq_nomes.values():
+                os.fsync(f.fileno())
+        self._arq.write(self._buffer)
+        self._desde_fsync += len(self._buffer)//LINHA_LOG.size
+        self._buffer = bytearray()
+        self._arq.flush()
+        if fsync:
+            os.fsync(self._arq.fileno())
+            self._desde_fsync = 0
+
+    def sincronizar(self):
+        self._descarregar(forcar_fsync=True)
+
+    def fechar(self, indexar: bool = True):
+        self.sincronizar()
+        self._arq.close()
+        for f in self._arq_nomes.values():
+            f.close()
+        if indexar and np is not None:
+            indexar_log(self.pasta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def _gravar_indice(caminho: str, chaves, n_chaves: int, primeira: int):
+    ordem = np.argsort(chaves, kind="stable").astype(np.int64)
+    offsets = np.zeros(n_chaves + 1, dtype=np.int64)
+    np.cumsum(np.bincount(chaves, minlength=n_chaves), out=offsets[1:])
+    with open(caminho + ".tmp", "wb") as f:
+        f.write(CABECALHO_IDX.pack(MAGICO_IDX, len(chaves), primeira, n_chaves))
+        f.write(offsets.tobytes())
+        f.write(ordem.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(caminho + ".tmp", caminho)
+
+
+def indexar_log(pasta: str):
+    _exigir_numpy()
+    with LeitorLog(pasta) as log:
+        if not len(log):
+            return
+        dias = log.coluna("dia")
+        dia0 = int(dias.min())
+        _gravar_indice(os.path.join(pasta, "indice_item.bin"), log.coluna("item"), len(log.itens), 0)
+        _gravar_indice(os.path.join(pasta, "indice_dia.bin"), (dias - dia0).astype(np.int64),
+                       int(dias.max()) - dia0 + 1, dia0)
+
+
+class _IndiceCSR:
+    def __init__(self, offsets, posicoes, primeira: int):
+        self.offsets, self.posicoes, self.primeira = offsets, posicoes, primeira
+
+    def posicoes_de(self, chave: int):
+        k = chave - self.primeira
+        if k < 0 or k + 1 >= len(self.offsets):
+            return self.posicoes[:0]
+        return self.posicoes[self.offsets[k]:self.offsets[k+1]]
+
+
+class LeitorLog:
+    def __init__(self, pasta: str):
+        self.pasta = pasta
+        self.setores = _ler_tabela_strings(os.path.join(pasta, "setores.txt"))
+        self.itens = _ler_tabela_strings(os.path.join(pasta, "itens.txt"))
+        self._item_id = {n: i for i, n in enumerate(self.itens)}
+        self._mapas: List[Any] = []
+        self._mm = self._mapear(os.path.join(pasta, "registros.bin"))
+        magico, _, tam = CABECALHO_LOG.unpack_from(self._mm, 0)
+        if magico != MAGICO_LOG or tam != LINHA_LOG.size:
+            raise ValueError(f"{pasta}: não é um log de consumo válido.")
+        self._n = (len(self._mm) - CABECALHO_LOG.size) // LINHA_LOG.size
+        self.linhas = (np.frombuffer(self._mm, dtype=_dtype_log(), count=self._n,
+                                     offset=CABECALHO_LOG.size) if np is not None else None)
+        self._indices: Dict[str, Optional[_IndiceCSR]] = {}
+
+    def _mapear(self, caminho: str):
+        with open(caminho, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapas.append(mm)
+        return mm
+
+    def __len__(self):
+        return self._n
+
+    def coluna(self, nome: str):
+        # visão sem cópia de uma coluna: dia, setor, item, quantidade ou validade
+        _exigir_numpy()
+        return self.linhas[nome]
+
+    def registro(self, i: int) -> Consumo:
+        dia, setor, item, qtd, val = LINHA_LOG.unpack_from(self._mm, CABECALHO_LOG.size + i*LINHA_LOG.size)
+        return Consumo(data=date.fromordinal(dia), setor=self.setores[setor], item=self.itens[item],
+                       quantidade_consumida=qtd, validade=date.fromordinal(val))
+
+    def __iter__(self) -> Iterator[Consumo]:
+        return (self.registro(i) for i in range(self._n))
+
+    def _indice(self, nome: str) -> Optional[_IndiceCSR]:
+        if nome not in self._indices:
+            self._indices[nome] = None
+            caminho = os.path.join(self.pasta, f"indice_{nome}.bin")
+            if np is not None and os.path.exists(caminho):
+                mm = self._mapear(caminho)
+                magico, n, primeira, n_chaves = CABECALHO_IDX.unpack_from(mm, 0)
+                if magico == MAGICO_IDX and n == self._n:  # índice em dia com o log
+                    offsets = np.frombuffer(mm, dtype=np.int64, count=n_chaves+1,
+                                            offset=CABECALHO_IDX.size)
+                    posicoes = np.frombuffer(mm, dtype=np.int64, count=n,
+                                             offset=CABECALHO_IDX.size + 8*(n_chaves+1))
+                    self._indices[nome] = _IndiceCSR(offsets, posicoes, primeira)
+        return self._indices[nome]
+
+    def posicoes_item(self, item: str):
+        _exigir_numpy()
+        i = self._item_id.get(item)
+        if i is None:
+            return np.empty(0, dtype=np.int64)
+        idx = self._indice("item")
+        return idx.posicoes_de(i) if idx else np.flatnonzero(self.coluna("item") == i)
+
+    def posicoes_dia(self, dia: date):
+        _exigir_numpy()
+        idx = self._indice("dia")
+        if idx:
+            return idx.posicoes_de(dia.toordinal())
+        return np.flatnonzero(self.coluna("dia") == dia.toordinal())
+
+    def demandas_por_dia(self) -> List[int]:
+        # vetor denso (dias sem consumo = 0), igual a AgregadorDemanda.demandas()
+        if not self._n: return []
+        if np is None:
+            ag = AgregadorDemanda(); ag.estender(self)
+            return ag.demandas()
+        dias = self.coluna("dia")
+        dia0 = int(dias.min())
+        # pesos em float64 são exatos enquanto cada total diário < 2**53
+        soma = np.bincount(dias - dia0, weights=self.coluna("quantidade"))
+        return soma.astype(np.int64).tolist()
+
+    def fechar(self):
+        self.linhas = None
+        self._indices.clear()
+        for mm in self._mapas:
+            try:
+                mm.close()
+            except BufferError:  # ainda há visões NumPy vivas; o GC fecha depois
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
 # =============================================================================
 # ======================== PROGRAMAÇÃO DINÂMICA ===============================
 # =============================================================================
@@ -159,6 +951,7 @@ def quick_sort(arr: List[Any], key: Callable[[Any], Any]) -> List[Any]:
 #       Bellman: V(t,s) = min_q [ C(q,s) + V(t+1, s') ].
 #   • Condição de contorno: V(T, s) = 0 para todo s (horizonte finito).
 # Observação: como a demanda é determinística (simulada), a PD é exata.
+# (dp_estocastico trata a demanda como distribuição e minimiza o custo esperado.)
 # =============================================================================
 
 @dataclass
@@ -174,10 +967,27 @@ class DpResult:
     custo_total: int
     politica: List[int]  # tamanhos de pedido q_t
     trajetoria_estoque: List[int]
+    estados_avaliados: Optional[int] = None  # estados (t, s) visitados (versões top‑down)
+    cache_hits: Optional[int] = None
+    cache_misses: Optional[int] = None
+    pico_memoria_bytes: Optional[int] = None  # tabelas da PD (modo com checkpoints)
+    tempos: Optional[Dict[str, float]] = None  # segundos por fase (só com profilar=True)
+
+
+# Medição por fase (opcional): os solvers aceitam profilar=True e devolvem em
+# DpResult.tempos quanto tempo foi gasto preenchendo a tabela e reconstruindo a
+# política/trajetória. Sem profilar o resultado não muda (tempos fica None).
+
+def _tempos_fases(inicio: float, fim_tabela: float) -> Dict[str, float]:
+    fim = time.perf_counter()
+    return {"preenchimento": fim_tabela - inicio, "reconstrucao": fim - fim_tabela,
+            "total": fim - inicio}
 
 # -------- Top‑down com memoização ------------------------------------------------
 
-def dp_topdown(demandas: List[int], S0: int, params: DPParams) -> DpResult:
+def dp_topdown(demandas: List[int], S0: int, params: DPParams,
+               profilar: bool = False) -> DpResult:
+    inicio = time.perf_counter()
     T = len(demandas)
     c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
 
@@ -201,6 +1011,7 @@ def dp_topdown(demandas: List[int], S0: int, params: DPParams) -> DpResult:
         return (best_cost, best_q)
 
     custo, _ = V(0, S0)
+    fim_tabela = time.perf_counter()
     # Reconstrução da política e trajetória
     polit, traj = [], [S0]
     s = S0
@@ -210,11 +1021,79 @@ def dp_topdown(demandas: List[int], S0: int, params: DPParams) -> DpResult:
         estoque_apos_compra = min(s + q, Smax)
         s = max(0, estoque_apos_compra - demandas[t])
         traj.append(s)
-    return DpResult(custo_total=custo, politica=polit, trajetoria_estoque=traj)
+    info = V.cache_info()
+    return DpResult(custo_total=custo, politica=polit, trajetoria_estoque=traj,
+                    estados_avaliados=info.currsize, cache_hits=info.hits,
+                    cache_misses=info.misses,
+                    tempos=_tempos_fases(inicio, fim_tabela) if profilar else None)
+
+# -------- Top‑down sem recursão (só estados alcançáveis) ------------------------
+# Mesma recorrência de dp_topdown, mas com pilha explícita: não esbarra no limite
+# de recursão do Python em horizontes longos. Só os estados (t, s) alcançáveis a
+# partir de S0 são avaliados, e a memória é um dict por dia (a faixa de estoques
+# realmente atingida), não a tabela (T+1)×(Smax+1) inteira.
+# As estatísticas de cache seguem a contagem do lru_cache: cada consulta a V(t, s)
+# é um hit se o estado já foi calculado; a primeira é um miss.
+
+def dp_topdown_iterativo(demandas: List[int], S0: int, params: DPParams,
+                         profilar: bool = False) -> DpResult:
+    inicio = time.perf_counter()
+    T = len(demandas)
+    c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
+    s0 = min(max(S0, 0), Smax)
+
+    custo: List[Dict[int, int]] = [{} for _ in range(T+1)]
+    decisao: List[Dict[int, int]] = [{} for _ in range(T)]
+    avaliados = 0
+    pilha = [(0, s0)]
+    while pilha:
+        t, s = pilha[-1]
+        if s in custo[t]:
+            pilha.pop(); continue
+        if t == T:
+            custo[t][s] = 0
+            pilha.pop(); continue
+        d = demandas[t]
+        prox = custo[t+1]
+        # sucessores: s' = max(0, y − d) para y ∈ [s, min(s+Qmax, Smax)]
+        pendentes = [(t+1, sp) for sp in range(max(0, s-d), max(0, min(s+Qmax, Smax)-d)+1)
+                     if sp not in prox]
+        if pendentes:
+            pilha.extend(pendentes); continue
+        best, best_q = 10**12, 0
+        for q in range(0, Qmax+1):
+            estoque_apos_compra = min(s + q, Smax)
+            falta = max(0, d - estoque_apos_compra)
+            s_prime = max(0, estoque_apos_compra - d)
+            total = c*q + h*s_prime + p*falta + prox[s_prime]
+            if total < best:
+                best, best_q = total, q
+        custo[t][s] = best
+        decisao[t][s] = best_q
+        avaliados += 1
+        pilha.pop()
+    fim_tabela = time.perf_counter()
+
+    polit, traj = [], [s0]
+    s = s0
+    for t in range(T):
+        q = decisao[t][s]
+        polit.append(q)
+        estoque_apos_compra = min(s + q, Smax)
+        s = max(0, estoque_apos_compra - demandas[t])
+        traj.append(s)
+    misses = sum(len(nivel) for nivel in custo)
+    chamadas = 1 + (Qmax+1)*avaliados
+    return DpResult(custo_total=custo[0][s0], politica=polit, trajetoria_estoque=traj,
+                    estados_avaliados=misses, cache_hits=chamadas - misses,
+                    cache_misses=misses,
+                    tempos=_tempos_fases(inicio, fim_tabela) if profilar else None)
 
 # -------- Bottom‑up -------------------------------------------------------------
 
-def dp_bottomup(demandas: List[int], S0: int, params: DPParams) -> DpResult:
+def dp_bottomup(demandas: List[int], S0: int, params: DPParams,
+                profilar: bool = False) -> DpResult:
+    inicio = time.perf_counter()
     T = len(demandas)
     c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
 
@@ -235,6 +1114,7 @@ def dp_bottomup(demandas: List[int], S0: int, params: DPParams) -> DpResult:
                     best, best_q = total, q
             V[t][s] = best
             PI[t][s] = best_q
+    fim_tabela = time.perf_counter()
 
     custo = V[0][min(S0, Smax)]
     polit, traj = [], [min(S0, Smax)]
@@ -245,17 +1125,1126 @@ def dp_bottomup(demandas: List[int], S0: int, params: DPParams) -> DpResult:
         estoque_apos_compra = min(s + q, Smax)
         s = max(0, estoque_apos_compra - demandas[t])
         traj.append(s)
+    return DpResult(custo_total=custo, politica=polit, trajetoria_estoque=traj,
+                    tempos=_tempos_fases(inicio, fim_tabela) if profilar else None)
+
+# -------- Bottom‑up com janela deslizante (O(T·Smax)) ---------------------------
+# Reescrevendo o passo de Bellman no nível pós-pedido y = min(s+q, Smax):
+#   V(t,s) = −c*s + min_{y ∈ [s, s+Qmax]} [ c*y + G_t(y) ]
+#   G_t(y) = h*max(0, y−d) + p*max(0, d−y) + V(t+1, max(0, y−d))
+# O mínimo sobre a janela [s, s+Qmax] é mantido por uma fila monotônica enquanto
+# s desce de Smax até 0, então cada dia custa O(Smax) em vez de O(Smax·Qmax).
+# O nível y = Smax é tratado à parte: ele absorve todo q ≥ Smax−s (o excesso é
+# cortado pela capacidade), e o q escolhido ali é o menor (ou Qmax se c < 0),
+# exatamente como o laço original. Empates ficam com o menor q, como em
+# dp_bottomup, então custo, política e trajetória são idênticos.
+
+def _passo_janela(d: int, prox, c: int, h: int, p: int, Qmax: int,
+                  Smax: int, saida: Optional[Tuple[Any, Any, Any]] = None) -> Tuple[List[int], List[int]]:
+    # um dia do Bellman: dado V(t+1, ·) devolve (V(t, ·), PI(t, ·))
+    # saida: buffers (H, V(t), PI(t)) de Smax+1 posições reaproveitados entre os
+    # dias (ex.: array('q') em dp_checkpoint); sem ela, listas novas a cada dia
+    H, Vt, PIt = saida if saida is not None else ([0]*(Smax+1), None, None)
+    # H[y] = c*y + G_t(y)
+    for y in range(Smax+1):
+        if y >= d:
+            H[y] = c*y + h*(y-d) + prox[y-d]
+        else:
+            H[y] = c*y + p*(d-y) + prox[0]
+    return _minimo_janela(H, c, Qmax, Smax, Vt, PIt)
+
+
+def _minimo_janela(H, c: int, Qmax: int, Smax: int, Vt: Any = None,
+                   PIt: Any = None) -> Tuple[List[Any], List[int]]:
+    # V(t,s) = −c*s + min_{y ∈ [s, s+Qmax]} H[y], com o nível Smax tratado à parte
+    G_cheio = H[Smax] - c*Smax
+    q_cheio_neg = c < 0  # com c < 0 o melhor q que enche o estoque é Qmax
+
+    if Vt is None:
+        Vt, PIt = [0]*(Smax+1), [0]*(Smax+1)
+    # s = Smax: a única opção é y = Smax
+    PIt[Smax] = Qmax if q_cheio_neg else 0
+    Vt[Smax] = c*PIt[Smax] + G_cheio
+
+    janela: deque = deque()  # y's; H estritamente decrescente da esquerda p/ direita
+    for s in range(Smax-1, -1, -1):
+        while janela and H[janela[0]] >= H[s]:
+            janela.popleft()
+        janela.appendleft(s)
+        while janela[-1] > s + Qmax:
+            janela.pop()
+        y = janela[-1]
+        best, best_q = H[y] - c*s, y - s
+        if s + Qmax >= Smax:
+            q = Qmax if q_cheio_neg else Smax - s
+            total = c*q + G_cheio
+            if total < best:
+                best, best_q = total, q
+        Vt[s] = best
+        PIt[s] = best_q
+    return Vt, PIt
+
+
+def dp_sliding_window(demandas: List[int], S0: int, params: DPParams,
+                      profilar: bool = False) -> DpResult:
+    inicio = time.perf_counter()
+    T = len(demandas)
+    c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
+
+    V = [[0]*(Smax+1) for _ in range(T+1)]
+    PI = [[0]*(Smax+1) for _ in range(T)]
+
+    for t in range(T-1, -1, -1):
+        V[t], PI[t] = _passo_janela(demandas[t], V[t+1], c, h, p, Qmax, Smax)
+    fim_tabela = time.perf_counter()
+
+    custo = V[0][min(S0, Smax)]
+    polit, traj = [], [min(S0, Smax)]
+    s = traj[0]
+    for t in range(T):
+        q = PI[t][s]
+        polit.append(q)
+        estoque_apos_compra = min(s + q, Smax)
+        s = max(0, estoque_apos_compra - demandas[t])
+        traj.append(s)
+    return DpResult(custo_total=custo, politica=polit, trajetoria_estoque=traj,
+                    tempos=_tempos_fases(inicio, fim_tabela) if profilar else None)
+
+
+# -------- Bottom‑up paralelo: passo diário fatiado em memória compartilhada -----
+# Dentro de um dia t, cada V(t, s) só depende de V(t+1, ·). As linhas V(t+1),
+# V(t), o vetor H do dia e a tabela PI ficam em multiprocessing.shared_memory;
+# a faixa [0, Smax] é fatiada entre os processos do pool em duas fases por dia:
+#   1) cada fatia calcula H[y] só no seu intervalo e, dentro dele, o argmin de
+#      H por prefixo e por sufixo em blocos alinhados de Qmax+1 posições
+#      (van Herk/Gil-Werman);
+#   2) o processo principal propaga os argmins entre fatias vizinhas (O(nº de
+#      fatias)) e cada fatia resolve min_{y ∈ [s, s+Qmax]} H[y] em O(1) por s,
+#      combinando o sufixo do bloco de s com o prefixo do bloco de s+Qmax.
+# Nenhuma posição de H é calculada duas vezes: o trabalho por dia é O(Smax +
+# nº de fatias), independente de Qmax. Empates ficam com o menor y (menor q),
+# como na fila monotônica de _minimo_janela, então o resultado é o mesmo de
+# dp_sliding_window. Só nomes, índices e parâmetros trafegam entre processos.
+# Abaixo de LIMITE_PARALELO estados por dia, o custo de sincronizar não compensa
+# e a PD roda em série (dp_sliding_window).
+
+LIMITE_PARALELO = 20_000
+
+_SHM_ANEXADOS: Dict[str, Any] = {}
+
+
+def _fase_h(d: int, prox, H, SUF, PRE, a: int, b: int, c: int, h: int, p: int,
+            Qmax: int, Smax: int):
+    # fase 1 para y ∈ [a, b): H[y] e argmins locais (presos ao bloco e à fatia)
+    for y in range(a, b):
+        if y >= d:
+            H[y] = c*y + h*(y-d) + prox[y-d]
+        else:
+            H[y] = c*y + p*(d-y) + prox[0]
+    w, fim = Qmax + 1, min(b, Smax)  # janela só em y < Smax
+    for y in range(fim-1, a-1, -1):
+        if y == fim-1 or (y+1) % w == 0:
+            SUF[y] = y
+        else:
+            j = SUF[y+1]
+            SUF[y] = y if H[y] <= H[j] else j
+    for y in range(a, fim):
+        if y == a or y % w == 0:
+            PRE[y] = y
+        else:
+            i = PRE[y-1]
+            PRE[y] = i if H[i] <= H[y] else y
+
+
+def _bordas_fatias(H, SUF, PRE, passo: int, Qmax: int, Smax: int) -> Tuple[List[int], List[int]]:
+    # argmin verdadeiro no início (sufixo) e no fim (prefixo) de cada fatia,
+    # propagado pelas fatias vizinhas que dividem o mesmo bloco
+    w = Qmax + 1
+    inicios = list(range(0, Smax, passo))
+    K = len(inicios)
+    tsuf, tpre = [0]*K, [0]*K
+    for k in range(K-1, -1, -1):
+        a, fim = inicios[k], min(inicios[k] + passo, Smax)
+        i = SUF[a]
+        if (a//w + 1)*w - 1 >= fim and k + 1 < K:  # o bloco de a continua na fatia seguinte
+            j = tsuf[k+1]
+            i = i if H[i] <= H[j] else j
+        tsuf[k] = i
+    for k in range(K):
+        a, fim = inicios[k], min(inicios[k] + passo, Smax)
+        j = PRE[fim-1]
+        if ((fim-1)//w)*w < a and k > 0:  # o bloco de fim−1 começou numa fatia anterior
+            i = tpre[k-1]
+            j = i if H[i] <= H[j] else j
+        tpre[k] = j
+    return tsuf, tpre
+
+
+def _fase_janela(H, SUF, PRE, tsuf: List[int], tpre: List[int], passo: int,
+                 a: int, b: int, c: int, Qmax: int, Smax: int) -> Tuple[List[int], List[int]]:
+    # fase 2 para s ∈ [a, b): V(t, s) e PI(t, s)
+    w = Qmax + 1
+    G_cheio = H[Smax] - c*Smax
+    q_cheio_neg = c < 0
+
+    def suf(y):  # argmin de H em [y, fim do bloco de y] (preso a Smax−1)
+        k = y // passo
+        i = SUF[y]
+        fim = min((k+1)*passo, Smax)
+        if (y//w + 1)*w - 1 >= fim and k + 1 < len(tsuf):
+            j = tsuf[k+1]
+            i = i if H[i] <= H[j] else j
+        return i
+
+    def pre(y):  # argmin de H em [início do bloco de y, y]
+        k = y // passo
+        j = PRE[y]
+        if (y//w)*w < k*passo and k > 0:
+            i = tpre[k-1]
+            j = i if H[i] <= H[j] else j
+        return j
+
+    Vp, PIp = [0]*(b-a), [0]*(b-a)
+    for s in range(a, b):
+        if s == Smax:
+            PIp[s-a] = Qmax if q_cheio_neg else 0
+            Vp[s-a] = c*PIp[s-a] + G_cheio
+            continue
+        e = min(s + Qmax, Smax - 1)
+        y = suf(s)
+        if s // w != e // w:
+            j = pre(e)
+            if H[j] < H[y]:
+                y = j
+        best, best_q = H[y] - c*s, y - s
+        if s + Qmax >= Smax:
+            q = Qmax if q_cheio_neg else Smax - s
+            total = c*q + G_cheio
+            if total < best:
+                best, best_q = total, q
+        Vp[s-a] = best
+        PIp[s-a] = best_q
+    return Vp, PIp
+
+
+def _shm_visao(nome: str, formato: str):
+    shm = _SHM_ANEXADOS.get(nome)
+    if shm is None:
+        shm = _SHM_ANEXADOS[nome] = shared_memory.SharedMemory(name=nome)
+    return shm.buf.cast(formato)
+
+
+def _shm_fase_h(tarefa) -> None:
+    nome_prox, nome_h, nome_suf, nome_pre, d, a, b, c, h, p, Qmax, Smax = tarefa
+    _fase_h(d, _shm_visao(nome_prox, "q"), _shm_visao(nome_h, "q"), _shm_visao(nome_suf, "i"),
+            _shm_visao(nome_pre, "i"), a, b, c, h, p, Qmax, Smax)
+
+
+def _shm_fase_janela(tarefa) -> None:
+    nome_h, nome_suf, nome_pre, tsuf, tpre, passo, nome_atual, nome_pi, t, a, b, c, Qmax, Smax = tarefa
+    Vp, PIp = _fase_janela(_shm_visao(nome_h, "q"), _shm_visao(nome_suf, "i"),
+                           _shm_visao(nome_pre, "i"), tsuf, tpre, passo, a, b, c, Qmax, Smax)
+    _shm_visao(nome_atual, "q")[a:b] = array("q", Vp)
+    base = t*(Smax+1)
+    _shm_visao(nome_pi, "i")[base+a:base+b] = array("i", PIp)
+
+
+def dp_paralelo(demandas: List[int], S0: int, params: DPParams,
+                n_workers: Optional[int] = None,
+                limite_serial: int = LIMITE_PARALELO) -> DpResult:
+    T = len(demandas)
+    c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
+    workers = n_workers or os.cpu_count() or 1
+    if T == 0 or workers == 1 or Smax == 0 or Smax + 1 < limite_serial:
+        return dp_sliding_window(demandas, S0, params)
+
+    n = Smax + 1
+    linhas = [shared_memory.SharedMemory(create=True, size=8*n) for _ in range(2)]
+    buf_h = shared_memory.SharedMemory(create=True, size=8*n)
+    buf_suf, buf_pre = (shared_memory.SharedMemory(create=True, size=4*Smax) for _ in range(2))
+    tabela = shared_memory.SharedMemory(create=True, size=4*n*T)
+    try:
+        linhas[T % 2].buf[:8*n] = bytes(8*n)  # V(T, ·) = 0
+        passo = -(-n // workers)
+        fatias = [(a, min(n, a + passo)) for a in range(0, n, passo)]
+        H, SUF, PRE = buf_h.buf.cast("q"), buf_suf.buf.cast("i"), buf_pre.buf.cast("i")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for t in range(T-1, -1, -1):
+                prox, atual = linhas[(t+1) % 2].name, linhas[t % 2].name
+                # duas sincronizações por dia: list() espera todas as fatias de cada fase
+                list(pool.map(_shm_fase_h, [(prox, buf_h.name, buf_suf.name, buf_pre.name,
+                                             demandas[t], a, b, c, h, p, Qmax, Smax)
+                                            for a, b in fatias]))
+                tsuf, tpre = _bordas_fatias(H, SUF, PRE, passo, Qmax, Smax)
+                list(pool.map(_shm_fase_janela, [(buf_h.name, buf_suf.name, buf_pre.name, tsuf, tpre,
+                                                  passo, atual, tabela.name, t, a, b, c, Qmax, Smax)
+                                                 for a, b in fatias]))
+        H.release(); SUF.release(); PRE.release()
+        V0 = linhas[0].buf.cast("q")
+        PI = tabela.buf.cast("i")
+        s0 = min(S0, Smax)
+        custo = V0[s0]
+        polit, traj = [], [s0]
+        s = s0
+        for t in range(T):
+            q = PI[t*n + s]
+            polit.append(q)
+            s = max(0, min(s + q, Smax) - demandas[t])
+            traj.append(s)
+        V0.release(); PI.release()
+    finally:
+        for shm in (*linhas, buf_h, buf_suf, buf_pre, tabela):
+            shm.close()
+            shm.unlink()
     return DpResult(custo_total=custo, politica=polit, trajetoria_estoque=traj)
 
+
+def mesmo_resultado(a: DpResult, b: DpResult) -> bool:
+    return (a.custo_total == b.custo_total and a.politica == b.politica
+            and a.trajetoria_estoque == b.trajetoria_estoque)
+
+# -------- Política compacta (base-stock) ----------------------------------------
+# Com custo de compra linear, a decisão ótima de cada dia é uma regra "pedir até":
+#   q_t(s) = min(Qmax, S_t − s) se s < s_t, senão 0
+# Guardamos só o par (s_t, S_t) por dia — O(T) em vez da tabela PI O(T·Smax).
+# Cada par é extraído da linha PI[t] e conferido contra ela; se a linha não
+# seguir a regra (ex.: c < 0), aquele dia guarda a linha inteira (fallback).
+
+def _regra_base_stock(s_t: int, S_t: int, Qmax: int, s: int) -> int:
+    return 0 if s >= s_t else min(Qmax, S_t - s)
+
+
+def _par_base_stock(PIt: List[int], Qmax: int) -> Tuple[int, int, bool]:
+    # (s_t, S_t, a linha segue a regra?) — s_t é o primeiro s sem pedido e S_t
+    # vem do primeiro s com pedido abaixo de Qmax (se todos saturam, S_t ≥ s_t−1+Qmax)
+    s_t = next((s for s, q in enumerate(PIt) if q == 0), len(PIt))
+    nao_saturado = next((s for s in range(s_t) if PIt[s] < Qmax), None)
+    if nao_saturado is not None:
+        S_t = nao_saturado + PIt[nao_saturado]
+    else:
+        S_t = s_t + Qmax - 1 if s_t > 0 else 0
+    segue_regra = all(_regra_base_stock(s_t, S_t, Qmax, s) == q for s, q in enumerate(PIt))
+    return s_t, S_t, segue_regra
+
+
+class PoliticaBaseStock:
+    def __init__(self, Qmax: int, Smax: int):
+        self.Qmax = Qmax
+        self.Smax = Smax
+        self.ponto_pedido = array("q")  # s_t
+        self.nivel_alvo = array("q")    # S_t
+        self.linhas_fallback: Dict[int, array] = {}
+
+    def __len__(self):
+        return len(self.ponto_pedido)
+
+    def _regra(self, t: int, s: int) -> int:
+        return _regra_base_stock(self.ponto_pedido[t], self.nivel_alvo[t], self.Qmax, s)
+
+    def decidir(self, t: int, s: int) -> int:
+        s = min(max(s, 0), self.Smax)
+        linha = self.linhas_fallback.get(t)
+        if linha is not None:
+            return linha[s]
+        return self._regra(t, s)
+
+    def decidir_lote(self, t: int, s):
+        # decidir(t, ·) para um vetor NumPy de estoques
+        s = np.clip(s, 0, self.Smax)
+        linha = self.linhas_fallback.get(t)
+        if linha is not None:
+            return np.asarray(linha, dtype=np.int64)[s]
+        return np.where(s >= self.ponto_pedido[t], 0,
+                        np.minimum(self.Qmax, self.nivel_alvo[t] - s))
+
+    def adicionar_dia(self, PIt: List[int]):
+        # acrescenta o dia seguinte (t = len(self)) a partir da linha PI[t]
+        s_t, S_t, segue_regra = _par_base_stock(PIt, self.Qmax)
+        if not segue_regra:
+            self.linhas_fallback[len(self)] = array("q", PIt)
+        self.ponto_pedido.append(s_t)
+        self.nivel_alvo.append(S_t)
+
+    @classmethod
+    def de_tabela(cls, PI: List[List[int]], Qmax: int, Smax: int) -> "PoliticaBaseStock":
+        pol = cls(Qmax, Smax)
+        for PIt in PI:
+            pol.adicionar_dia(PIt)
+        return pol
+
+    def verificar(self, PI: List[List[int]]) -> bool:
+        return len(PI) == len(self) and all(
+            self.decidir(t, s) == q for t, PIt in enumerate(PI) for s, q in enumerate(PIt))
+
+    def executar(self, demandas: List[int], S0: int) -> Tuple[List[int], List[int]]:
+        # política e trajetória de estoque ao aplicar a regra sobre as demandas
+        polit, traj = [], [min(max(S0, 0), self.Smax)]
+        s = traj[0]
+        for t, d in enumerate(demandas):
+            q = self.decidir(t, s)
+            polit.append(q)
+            s = max(0, min(s + q, self.Smax) - d)
+            traj.append(s)
+        return polit, traj
+
+    def bytes_usados(self) -> int:
+        return (self.ponto_pedido.itemsize * (len(self.ponto_pedido) + len(self.nivel_alvo))
+                + sum(a.itemsize * len(a) for a in self.linhas_fallback.values()))
+
+    def para_dict(self) -> dict:
+        return {"Qmax": self.Qmax, "Smax": self.Smax,
+                "ponto_pedido": self.ponto_pedido.tolist(),
+                "nivel_alvo": self.nivel_alvo.tolist(),
+                "linhas_fallback": {str(t): a.tolist() for t, a in self.linhas_fallback.items()}}
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "PoliticaBaseStock":
+        pol = cls(dados["Qmax"], dados["Smax"])
+        pol.ponto_pedido = array("q", dados["ponto_pedido"])
+        pol.nivel_alvo = array("q", dados["nivel_alvo"])
+        pol.linhas_fallback = {int(t): array("q", a) for t, a in dados["linhas_fallback"].items()}
+        return pol
+
+
+def dp_politica_base_stock(demandas: List[int], S0: int,
+                           params: DPParams) -> Tuple[DpResult, PoliticaBaseStock]:
+    # passo da janela deslizante guardando só V(t+1, ·) e a política compacta;
+    # as linhas PI[t] são comprimidas à medida que saem (de trás para frente)
+    T = len(demandas)
+    c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
+    prox = [0]*(Smax+1)
+    pol = PoliticaBaseStock(Qmax, Smax)
+    for t in range(T-1, -1, -1):
+        prox, PIt = _passo_janela(demandas[t], prox, c, h, p, Qmax, Smax)
+        s_t, S_t, segue_regra = _par_base_stock(PIt, Qmax)
+        pol.ponto_pedido.append(s_t)
+        pol.nivel_alvo.append(S_t)
+        if not segue_regra:
+            pol.linhas_fallback[t] = array("q", PIt)
+    pol.ponto_pedido.reverse()
+    pol.nivel_alvo.reverse()
+    polit, traj = pol.executar(demandas, S0)
+    return DpResult(custo_total=prox[min(S0, Smax)], politica=polit, trajetoria_estoque=traj), pol
+
+# -------- Bottom‑up com checkpoints (memória O(√T·Smax)) ------------------------
+# Para horizontes de anos com Smax grande, as tabelas V e PI inteiras não cabem.
+# O passo para trás guarda só a linha corrente e a seguinte, mais uma cópia de V
+# a cada k ≈ √T dias (checkpoints). Na reconstrução, cada segmento [a, b) entre
+# checkpoints é recalculado a partir de V(b, ·) guardando apenas as k linhas de
+# PI do segmento. Pico ≈ (T/k + k + 4) linhas de Smax+1 inteiros, com o dobro de
+# passos de Bellman; custo e política são os mesmos de dp_bottomup.
+# Todas as linhas (checkpoints, PI e os buffers de trabalho H, V(t), V(t+1),
+# PI(t)) são array('q'), reaproveitados dia a dia, então 8 bytes por posição é o
+# tamanho real; a fila da janela (até Qmax+1 inteiros do Python) entra à parte.
+# Se max_memory_bytes comportar a tabela PI inteira, faz uma passada só.
+
+BYTES_FILA_JANELA = 48  # por posição da fila monotônica: ponteiro no deque + int boxed
+
+
+def _linha_q(Smax: int) -> array:
+    return array("q", bytes(8*(Smax+1)))
+
+
+class _BuffersJanela:
+    # H, V(t), V(t+1) e PI(t) em array('q'); V(t) e V(t+1) se alternam a cada dia
+    def __init__(self, Smax: int):
+        self.H, self.PIt = _linha_q(Smax), _linha_q(Smax)
+        self._linhas = [_linha_q(Smax), _linha_q(Smax)]
+
+    def passo(self, d: int, prox, c: int, h: int, p: int, Qmax: int, Smax: int):
+        destino = self._linhas[0] if prox is not self._linhas[0] else self._linhas[1]
+        return _passo_janela(d, prox, c, h, p, Qmax, Smax, (self.H, destino, self.PIt))
+
+
+def _segmento_pd(demandas: List[int], V_b: Any, a: int, b: int, params: DPParams,
+                 buffers: _BuffersJanela) -> Tuple[array, List[array]]:
+    # recalcula os dias [a, b) a partir de V(b, ·): devolve V(a, ·) e PI[a:b]
+    c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
+    PI: List[array] = [array("q")]*(b-a)
+    prox = V_b
+    for t in range(b-1, a-1, -1):
+        prox, PIt = buffers.passo(demandas[t], prox, c, h, p, Qmax, Smax)
+        PI[t-a] = array("q", PIt)
+    return prox, PI
+
+
+def dp_checkpoint(demandas: List[int], S0: int, params: DPParams,
+                  max_memory_bytes: Optional[int] = None) -> DpResult:
+    T = len(demandas)
+    Smax = params.Smax
+    linha = 8*(Smax+1)
+    # H, V(t), V(t+1), PI(t) e a linha de zeros V(T) + fila da janela
+    trabalho = 5*linha + BYTES_FILA_JANELA*(min(params.Qmax, Smax)+1)
+    completo = T*linha + trabalho
+    k = max(1, math.isqrt(T-1) + 1) if T else 1
+    n_ck = (T + k - 1)//k
+    reduzido = (n_ck + k)*linha + trabalho
+    if max_memory_bytes is not None and min(completo, reduzido) > max_memory_bytes:
+        raise MemoryError(f"PD precisa de pelo menos {min(completo, reduzido)} bytes "
+                          f"(limite {max_memory_bytes}).")
+
+    s0 = min(S0, Smax)
+    polit, traj = [], [s0]
+    buffers = _BuffersJanela(Smax)
+    zeros = _linha_q(Smax)  # V(T, ·)
+
+    def aplicar(PI: List[array], a: int):
+        s = traj[-1]
+        for i, PIt in enumerate(PI):
+            q = PIt[s]
+            polit.append(q)
+            s = max(0, min(s + q, Smax) - demandas[a+i])
+            traj.append(s)
+
+    if max_memory_bytes is not None and completo <= max_memory_bytes:
+        V0, PI = _segmento_pd(demandas, zeros, 0, T, params, buffers)
+        aplicar(PI, 0)
+        return DpResult(custo_total=V0[s0], politica=polit, trajetoria_estoque=traj,
+                        pico_memoria_bytes=completo)
+
+    # 1ª passada: só os checkpoints V(a, ·) com a = 0, k, 2k, ...
+    checkpoints: Dict[int, array] = {}
+    c, h, p, Qmax = params.c, params.h, params.p, params.Qmax
+    prox: Any = zeros
+    for a in reversed(range(0, T, k)):
+        for t in range(min(T, a + k)-1, a-1, -1):
+            prox, _ = buffers.passo(demandas[t], prox, c, h, p, Qmax, Smax)
+        checkpoints[a] = array("q", prox)
+    custo = prox[s0]
+
+    # 2ª passada: segmento a segmento, do início para o fim
+    pico = trabalho + len(checkpoints)*linha
+    for a in range(0, T, k):
+        b = min(T, a + k)
+        V_b = checkpoints[b] if b < T else zeros
+        _, PI = _segmento_pd(demandas, V_b, a, b, params, buffers)
+        pico = max(pico, trabalho + (len(checkpoints) + len(PI))*linha)
+        aplicar(PI, a)
+        del checkpoints[a], PI  # libera o segmento antes de montar o próximo
+    return DpResult(custo_total=custo, politica=polit, trajetoria_estoque=traj,
+                    pico_memoria_bytes=pico)
+
+# -------- PD com demanda estocástica (custo esperado) ---------------------------
+# A demanda de cada dia vira uma distribuição {d_k: prob_k} (estimada do
+# histórico de Consumo ou de muitos cenários simulados) e a PD minimiza o custo
+# esperado:
+#   V(t,s) = min_q [ c*q + Σ_k prob_k * ( h*s'_k + p*falta_k + V(t+1, s'_k) ) ]
+# O termo esperado só depende de y = min(s+q, Smax); ele é calculado para a
+# grade inteira de y de uma vez, como produto matriz (Smax+1, K) × vetor (K,), e
+# depois entra no mesmo mínimo em janela de dp_sliding_window.
+# A decisão depende da demanda realizada, então o resultado traz a política
+# completa (PoliticaBaseStock) e um ResultadoEstocastico com o custo esperado
+# (float, por isso fora de DpResult.custo_total) e a política/trajetória de
+# referência ao longo da demanda média (arredondada). Com distribuições de massa
+# única, o custo esperado é exatamente o custo_total da PD determinística.
+
+Distribuicao = Tuple[List[int], List[float]]  # (valores de demanda, probabilidades)
+
+
+@dataclass
+class ResultadoEstocastico:
+    custo_esperado: float
+    politica: List[int]  # pedidos q_t ao longo da demanda média
+    trajetoria_estoque: List[int]
+
+
+def distribuicao_empirica(amostras: List[int]) -> Distribuicao:
+    _exigir_numpy()
+    valores, contagens = np.unique(np.asarray(amostras, dtype=np.int64), return_counts=True)
+    return valores.tolist(), (contagens / contagens.sum()).tolist()
+
+
+def distribuicoes_de_cenarios(cenarios) -> List[Distribuicao]:
+    # cenarios: matriz (N, T) de demandas diárias → uma distribuição por dia
+    _exigir_numpy()
+    matriz = np.asarray(cenarios, dtype=np.int64)
+    return [distribuicao_empirica(matriz[:, t]) for t in range(matriz.shape[1])]
+
+
+def distribuicoes_do_historico(registros: List[Consumo], T: int) -> List[Distribuicao]:
+    # demanda estacionária: a mesma distribuição empírica dos totais diários em cada dia
+    dist = distribuicao_empirica(demandas_por_dia(registros) or [0])
+    return [dist]*T
+
+
+def demandas_por_cenario(col: ConsumoColunar, n_cenarios: int, dias: int):
+    # totais diários de cada cenário da simulação vetorizada → matriz (N, dias)
+    _exigir_numpy()
+    matriz = np.zeros((n_cenarios, dias), dtype=np.int64)
+    np.add.at(matriz, (col.cenario, col.dia), col.quantidade)
+    return matriz
+
+
+def dp_estocastico(distribuicoes: List[Distribuicao], S0: int,
+                   params: DPParams) -> Tuple[ResultadoEstocastico, PoliticaBaseStock]:
+    _exigir_numpy()
+    T = len(distribuicoes)
+    c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
+    y = np.arange(Smax+1, dtype=np.int64)[:, None]
+    prox = np.zeros(Smax+1)
+    PI: List[List[int]] = [[]]*T
+    for t in range(T-1, -1, -1):
+        valores, probs = distribuicoes[t]
+        d = np.asarray(valores, dtype=np.int64)[None, :]
+        s_prime = np.maximum(0, y - d)  # (Smax+1, K)
+        G = (h*s_prime + p*np.maximum(0, d - y) + prox[s_prime]) @ np.asarray(probs, dtype=float)
+        Vt, PI[t] = _minimo_janela((c*y[:, 0] + G).tolist(), c, Qmax, Smax)
+        prox = np.asarray(Vt, dtype=float)
+    pol = PoliticaBaseStock.de_tabela(PI, Qmax, Smax)
+    medias = [int(round(float(np.dot(v, pr)))) for v, pr in distribuicoes]
+    polit, traj = pol.executar(medias, S0)
+    return ResultadoEstocastico(custo_esperado=float(prox[min(S0, Smax)]),
+                                politica=polit, trajetoria_estoque=traj), pol
+
+# -------- Backtest Monte Carlo de políticas --------------------------------------
+# O custo de um DpResult é medido no mesmo caminho de demanda usado para
+# otimizar. O backtest reaplica uma política — tabela PI ou regra pedir-até
+# (PoliticaBaseStock) — em milhares de caminhos de demanda independentes:
+# todos os cenários avançam juntos, dia a dia, como vetores NumPy, e os
+# cenários são divididos em blocos de tamanho fixo entre processos. Reporta a
+# distribuição do custo total, dos dias com falta e do estoque final (média,
+# desvio, percentis).
+
+PERCENTIS = (5, 25, 50, 75, 95)
+
+
+@dataclass
+class ResultadoBacktest:
+    custo_total: Any     # (N,) custo de cada cenário
+    dias_com_falta: Any  # (N,)
+    estoque_final: Any   # (N,)
+
+    def __len__(self):
+        return len(self.custo_total)
+
+    def resumo(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for nome in ("custo_total", "dias_com_falta", "estoque_final"):
+            v = getattr(self, nome)
+            est = {"media": float(v.mean()), "desvio": float(v.std()),
+                   "min": float(v.min()), "max": float(v.max())}
+            est.update({f"p{q}": float(x) for q, x in zip(PERCENTIS, np.percentile(v, PERCENTIS))})
+            out[nome] = est
+        return out
+
+
+def _backtest_fatia(politica: Any, params: DPParams, S0: int, demandas) -> ResultadoBacktest:
+    c, h, p, Smax = params.c, params.h, params.p, params.Smax
+    N, T = demandas.shape
+    tabela = None if isinstance(politica, PoliticaBaseStock) else np.asarray(politica, dtype=np.int64)
+    s = np.full(N, min(max(S0, 0), Smax), dtype=np.int64)
+    custo = np.zeros(N, dtype=np.int64)
+    faltas = np.zeros(N, dtype=np.int64)
+    for t in range(T):
+        q = tabela[t][s] if tabela is not None else politica.decidir_lote(t, s)
+        d = demandas[:, t]
+        estoque_apos_compra = np.minimum(s + q, Smax)
+        falta = np.maximum(0, d - estoque_apos_compra)
+        s = np.maximum(0, estoque_apos_compra - d)
+        custo += c*q + h*s + p*falta
+        faltas += falta > 0
+    return ResultadoBacktest(custo_total=custo, dias_com_falta=faltas, estoque_final=s)
+
+
+def _backtest_fatia_simulada(tarefa) -> ResultadoBacktest:
+    politica, params, S0, estoque_base, n, semente = tarefa
+    T = len(politica)
+    col = simular_consumo_lote(estoque_base, dias=T, n_cenarios=n, semente=semente)
+    return _backtest_fatia(politica, params, S0, demandas_por_cenario(col, n, T))
+
+
+def _backtest_fatia_tarefa(tarefa) -> ResultadoBacktest:
+    return _backtest_fatia(*tarefa)
+
+
+def _juntar_backtests(partes: List[ResultadoBacktest]) -> ResultadoBacktest:
+    return ResultadoBacktest(*(np.concatenate([getattr(r, f) for r in partes])
+                               for f in ("custo_total", "dias_com_falta", "estoque_final")))
+
+
+BLOCO_CENARIOS = 1024  # cenários por bloco (e por semente filha)
+
+
+def _fatias(n: int) -> List[int]:
+    # blocos de tamanho fixo: a divisão (e portanto as sementes de cada bloco) não
+    # depende de `paralelo`, de max_workers nem do nº de núcleos da máquina
+    return [min(BLOCO_CENARIOS, n - i) for i in range(0, n, BLOCO_CENARIOS)]
+
+
+def _mapear(fn, tarefas: list, paralelo: bool, max_workers: Optional[int]) -> list:
+    # os workers só decidem como os blocos se distribuem entre os processos
+    if paralelo and len(tarefas) > 1:
+        workers = min(max_workers or os.cpu_count() or 1, len(tarefas))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(fn, tarefas, chunksize=math.ceil(len(tarefas) / workers)))
+    return [fn(t) for t in tarefas]
+
+
+def backtest(politica: Any, demandas, S0: int, params: DPParams,
+             max_workers: Optional[int] = None, paralelo: bool = True) -> ResultadoBacktest:
+    # demandas: matriz (N cenários, T dias); politica: PoliticaBaseStock ou tabela PI (T × Smax+1)
+    _exigir_numpy()
+    demandas = np.asarray(demandas, dtype=np.int64)
+    if demandas.ndim != 2 or demandas.shape[1] != len(politica):
+        raise ValueError("demandas deve ser uma matriz (cenários, dias) com o horizonte da política.")
+    tarefas, ini = [], 0
+    for n in _fatias(len(demandas)):
+        tarefas.append((politica, params, S0, demandas[ini:ini+n]))
+        ini += n
+    return _juntar_backtests(_mapear(_backtest_fatia_tarefa, tarefas, paralelo, max_workers))
+
+
+def backtest_simulado(politica: Any, estoque_base: dict, S0: int, params: DPParams,
+                      n_cenarios: int = 10_000, semente: int = 42,
+                      max_workers: Optional[int] = None, paralelo: bool = True) -> ResultadoBacktest:
+    # cada bloco simula os próprios caminhos (simular_consumo_lote) com uma semente
+    # filha de `semente`, sem trafegar a matriz entre processos; como os blocos têm
+    # tamanho fixo, a mesma semente dá o mesmo backtest com qualquer nº de workers
+    _exigir_numpy()
+    tamanhos = _fatias(n_cenarios)
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    tarefas = [(politica, params, S0, estoque_base, n, sem) for n, sem in zip(tamanhos, sementes)]
+    return _juntar_backtests(_mapear(_backtest_fatia_simulada, tarefas, paralelo, max_workers))
+
+# -------- Multirresolução (grade grossa → faixa fina) ---------------------------
+# Para capacidades de dezenas de milhares de unidades:
+#   1) resolve a PD numa grade grossa de passo k (estoque, pedido e demanda em
+#      lotes de k unidades, via dp_sliding_window);
+#   2) aplica a política grossa na resolução unitária e, em volta dessa
+#      trajetória, resolve a PD exata só numa faixa [traj_t − B, traj_t + B];
+#   3) recentra a faixa na nova trajetória ótima e dobra B até o custo parar de
+#      cair (ou a faixa cobrir todo [0, Smax], caso em que o resultado é exato).
+# Cada dia da faixa custa O(largura da faixa) em vez de O(Smax). Quando a PD
+# exata é viável (ou comparar_exato=True), reporta o custo exato e o speedup.
+
+LIMITE_EXATO = 5_000_000  # (Smax+1)·T até onde a comparação exata é automática
+_INF = float("inf")
+
+
+def _passo_faixa(d: int, prox: List[Any], Ln: int, Un: int, L: int, U: int,
+                 c: int, h: int, p: int, Qmax: int, Smax: int) -> Tuple[List[Any], List[int]]:
+    # Bellman restrito: estados s ∈ [L, U] no dia t, V(t+1, ·) conhecido só em
+    # [Ln, Un] (prox[s'−Ln]); fora da faixa o custo é infinito.
+    def H(y):
+        sp = y - d if y >= d else 0
+        if sp < Ln or sp > Un or prox[sp-Ln] == _INF:
+            return _INF
+        return c*y + (h*sp if y >= d else p*(d-y)) + prox[sp-Ln]
+
+    # região y ≥ d (s' = y − d na faixa seguinte), sem o nível Smax
+    A, B = max(d + Ln, L), min(d + Un, Smax - 1, U + Qmax)
+    HA = [H(y) for y in range(A, B+1)]
+    # região y < d (s' = 0): custo linear em y, o mínimo fica numa ponta
+    linear = Ln == 0 and prox[0] != _INF
+    G_cheio = H(Smax) - c*Smax
+    q_cheio_neg = c < 0
+
+    Vt: List[Any] = [_INF]*(U-L+1)
+    PIt = [0]*(U-L+1)
+    janela: deque = deque()
+    prox_y = B
+    for s in range(U, L-1, -1):
+        while prox_y >= max(s, A):
+            if HA[prox_y-A] != _INF:
+                while janela and HA[janela[0]-A] >= HA[prox_y-A]:
+                    janela.popleft()
+                janela.appendleft(prox_y)
+            prox_y -= 1
+        while janela and janela[-1] > s + Qmax:
+            janela.pop()
+        best, best_q = _INF, 0
+        hi = min(d-1, s+Qmax, Smax-1)
+        if linear and s <= hi:
+            y = hi if c - p < 0 else s
+            best, best_q = c*(y-s) + p*(d-y) + prox[0], y - s
+        if janela:
+            y = janela[-1]
+            total = HA[y-A] - c*s
+            if total < best:
+                best, best_q = total, y - s
+        if s + Qmax >= Smax and G_cheio != _INF:
+            q = Qmax if q_cheio_neg else Smax - s
+            total = c*q + G_cheio
+            if total < best:
+                best, best_q = total, q
+        Vt[s-L] = best
+        PIt[s-L] = best_q
+    return Vt, PIt
+
+
+def _dp_faixa(demandas: List[int], s0: int, params: DPParams,
+              faixas: List[Tuple[int, int]]) -> DpResult:
+    c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
+    T = len(demandas)
+    prox: List[Any] = [0]*(faixas[T][1] - faixas[T][0] + 1)
+    PI: List[List[int]] = [[]]*T
+    for t in range(T-1, -1, -1):
+        (L, U), (Ln, Un) = faixas[t], faixas[t+1]
+        prox, PI[t] = _passo_faixa(demandas[t], prox, Ln, Un, L, U, c, h, p, Qmax, Smax)
+    polit, traj = [], [s0]
+    s = s0
+    for t in range(T):
+        q = PI[t][s - faixas[t][0]]
+        polit.append(q)
+        s = max(0, min(s + q, Smax) - demandas[t])
+        traj.append(s)
+    return DpResult(custo_total=prox[s0 - faixas[0][0]], politica=polit, trajetoria_estoque=traj)
+
+
+@dataclass
+class ResultadoMultires:
+    resultado: DpResult
+    passo: int
+    faixa: int              # meia-largura B final
+    iteracoes: int
+    tempo_s: float
+    custo_grosso: int       # custo da política grossa aplicada na resolução unitária
+    custo_exato: Optional[int] = None
+    tempo_exato_s: Optional[float] = None
+
+    @property
+    def gap(self) -> Optional[float]:
+        if self.custo_exato is None: return None
+        return (self.resultado.custo_total - self.custo_exato) / max(1, abs(self.custo_exato))
+
+    @property
+    def speedup(self) -> Optional[float]:
+        if self.tempo_exato_s is None: return None
+        return self.tempo_exato_s / max(self.tempo_s, 1e-9)
+
+
+def dp_multiresolucao(demandas: List[int], S0: int, params: DPParams,
+                      passo: Optional[int] = None, faixa_inicial: Optional[int] = None,
+                      max_iteracoes: int = 8,
+                      comparar_exato: Optional[bool] = None) -> ResultadoMultires:
+    inicio = time.perf_counter()
+    c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
+    T = len(demandas)
+    s0 = min(max(S0, 0), Smax)
+    k = passo or max(1, Smax // 256)
+
+    grosso = dp_sliding_window([(d + k//2)//k for d in demandas], (s0 + k//2)//k,
+                               DPParams(c=c, h=h, p=p, Qmax=Qmax//k, Smax=Smax//k))
+    centro, s, custo_grosso = [s0], s0, 0
+    for t, qc in enumerate(grosso.politica):
+        q = min(Qmax, qc*k)
+        y = min(s + q, Smax)
+        s = max(0, y - demandas[t])
+        custo_grosso += c*q + h*s + p*max(0, demandas[t] - y)
+        centro.append(s)
+
+    B = faixa_inicial or 2*k
+    melhor: Optional[DpResult] = None
+    iteracoes = 0
+    while iteracoes < max_iteracoes:
+        iteracoes += 1
+        faixas = [(max(0, x - B), min(Smax, x + B)) for x in centro]
+        res = _dp_faixa(demandas, s0, params, faixas)
+        cobre_tudo = all(L == 0 and U == Smax for L, U in faixas)
+        if melhor is not None and res.custo_total >= melhor.custo_total:
+            break
+        melhor, centro = res, res.trajetoria_estoque
+        if cobre_tudo:
+            break
+        B *= 2
+    tempo = time.perf_counter() - inicio
+
+    out = ResultadoMultires(resultado=melhor, passo=k, faixa=B, iteracoes=iteracoes,
+                            tempo_s=tempo, custo_grosso=custo_grosso)
+    if comparar_exato or (comparar_exato is None and (Smax+1)*T <= LIMITE_EXATO):
+        t0 = time.perf_counter()
+        out.custo_exato = dp_sliding_window(demandas, s0, params).custo_total
+        out.tempo_exato_s = time.perf_counter() - t0
+    return out
+
+# -------- Cache de linhas da função-valor por sufixo de demanda -----------------
+# V(t, ·) e PI(t, ·) só dependem de demandas[t:], Smax e dos custos. Guardando
+# cada linha sob a chave (hash do sufixo demandas[t:], parâmetros), um novo
+# solve percorre os dias de trás para frente e só recalcula as linhas ausentes:
+#   • horizonte rolando (o dia 0 já passou e saiu da lista): todos os sufixos
+#     já estão no cache e nada é recalculado;
+#   • mudança nos primeiros k dias: só as k primeiras linhas são refeitas.
+# (Acrescentar um dia novo no fim muda todos os sufixos, então nada é reaproveitado.)
+# Despejo LRU limitado por um orçamento em bytes; as linhas ficam em array('q').
+
+class CacheSolucoes:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes_usados = 0
+        self.hits = 0
+        self.misses = 0
+        self._linhas: OrderedDict = OrderedDict()  # chave -> (V_t, PI_t)
+
+    def obter(self, chave) -> Optional[Tuple[array, array]]:
+        linha = self._linhas.get(chave)
+        if linha is None:
+            self.misses += 1
+            return None
+        self._linhas.move_to_end(chave)
+        self.hits += 1
+        return linha
+
+    def guardar(self, chave, Vt: List[int], PIt: List[int]) -> Tuple[array, array]:
+        linha = (array("q", Vt), array("q", PIt))
+        tam = _bytes_linha(linha)
+        if chave in self._linhas:
+            self.bytes_usados -= _bytes_linha(self._linhas.pop(chave))
+        if tam <= self.max_bytes:
+            self._linhas[chave] = linha
+            self.bytes_usados += tam
+            while self.bytes_usados > self.max_bytes:
+                _, velha = self._linhas.popitem(last=False)
+                self.bytes_usados -= _bytes_linha(velha)
+        return linha
+
+    def taxa_acerto(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def limpar(self):
+        self._linhas.clear()
+        self.bytes_usados = self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._linhas)
+
+
+def _bytes_linha(linha: Tuple[array, array]) -> int:
+    return sum(a.itemsize * len(a) for a in linha)
+
+
+def chaves_sufixo(demandas: List[int], params: DPParams) -> List[Tuple[bytes, tuple]]:
+    # hash encadeado: h_t = H(d_t || h_{t+1}), O(T) para todos os sufixos
+    pr = astuple(params)
+    chaves: List[Tuple[bytes, tuple]] = [(b"", pr)] * len(demandas)
+    h = b""
+    for t in range(len(demandas)-1, -1, -1):
+        h = hashlib.blake2b(demandas[t].to_bytes(8, "little", signed=True) + h,
+                            digest_size=16).digest()
+        chaves[t] = (h, pr)
+    return chaves
+
+
+CACHE_PD = CacheSolucoes()
+
+
+def dp_cached(demandas: List[int], S0: int, params: DPParams,
+              cache: Optional[CacheSolucoes] = None) -> DpResult:
+    cache = CACHE_PD if cache is None else cache
+    T = len(demandas)
+    c, h, p, Qmax, Smax = params.c, params.h, params.p, params.Qmax, params.Smax
+    chaves = chaves_sufixo(demandas, params)
+
+    PI: List[Any] = [None]*T
+    prox: Any = [0]*(Smax+1)
+    hits = misses = 0
+    for t in range(T-1, -1, -1):
+        linha = cache.obter(chaves[t])
+        if linha is None:
+            linha = cache.guardar(chaves[t], *_passo_janela(demandas[t], prox, c, h, p, Qmax, Smax))
+            misses += 1
+        else:
+            hits += 1
+        prox, PI[t] = linha
+
+    custo = prox[min(S0, Smax)]
+    polit, traj = [], [min(S0, Smax)]
+    s = traj[0]
+    for t in range(T):
+        q = PI[t][s]
+        polit.append(q)
+        estoque_apos_compra = min(s + q, Smax)
+        s = max(0, estoque_apos_compra - demandas[t])
+        traj.append(s)
+    return DpResult(custo_total=custo, politica=polit, trajetoria_estoque=traj,
+                    cache_hits=hits, cache_misses=misses)
+
+# -------- Memo de resultados completos da PD ------------------------------------
+# As opções 6 e 7 resolvem a mesma instância com vários solvers; o DpResult de
+# cada (solver, demandas, S0, parâmetros) fica guardado (LRU) e é reaproveitado
+# entre as opções em vez de refazer a PD.
+
+class MemoResultadosPD:
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._resultados: OrderedDict = OrderedDict()
+
+    def obter(self, solver: Callable[..., DpResult], demandas: List[int], S0: int,
+              params: DPParams) -> DpResult:
+        chave = (solver.__name__, tuple(demandas), S0, astuple(params))
+        res = self._resultados.get(chave)
+        if res is not None:
+            self._resultados.move_to_end(chave)
+            self.hits += 1
+            return res
+        self.misses += 1
+        res = self._resultados[chave] = solver(demandas, S0, params)
+        if len(self._resultados) > self.maxsize:
+            self._resultados.popitem(last=False)
+        return res
+
+
+MEMO_PD = MemoResultadosPD()
+
+# -------- Bottom‑up vetorizado (NumPy) e em lote de parâmetros ------------------
+# Cada dia V[t] e PI[t] saem de operações sobre o plano (s, q) inteiro, em int64.
+# Um lote de DPParams (mesmos Smax/Qmax, c/h/p variando) é resolvido de uma vez,
+# com um eixo extra de parâmetros: custo[k, s, q]. O argmin em q devolve o
+# primeiro mínimo, ou seja, o menor q — o mesmo desempate de dp_bottomup.
+# O lote é processado em blocos para limitar a memória de cada bloco: o cubo
+# custo[k, s, q] em int64 (montado no lugar, um só por dia) mais a tabela PI
+# (T, k, s), guardada em int16/int32 — o bastante para q <= Qmax.
+
+MAX_BYTES_LOTE = 1 << 28  # ~256 MB por bloco (cubo int64 + PI)
+
+
+def _dtype_politica(Qmax: int):
+    return np.int16 if Qmax <= np.iinfo(np.int16).max else np.int32
+
+
+def dp_bottomup_lote(demandas: List[int], S0: int, lote: List[DPParams]) -> List[DpResult]:
+    _exigir_numpy()
+    if not lote:
+        return []
+    Qmax, Smax = lote[0].Qmax, lote[0].Smax
+    if any(pr.Qmax != Qmax or pr.Smax != Smax for pr in lote):
+        raise ValueError("Todos os DPParams do lote devem ter o mesmo Qmax e Smax.")
+    T = len(demandas)
+    # bytes por conjunto de parâmetros: cubo (S+1, Q+1) int64 + PI (T, S+1)
+    por_param = 8*(Smax+1)*(Qmax+1) + T*(Smax+1)*np.dtype(_dtype_politica(Qmax)).itemsize
+    por_bloco = max(1, MAX_BYTES_LOTE // por_param)
+    resultados: List[DpResult] = []
+    for ini in range(0, len(lote), por_bloco):
+        resultados.extend(_dp_bottomup_bloco(demandas, S0, lote[ini:ini+por_bloco], T, Qmax, Smax))
+    return resultados
+
+
+def _dp_bottomup_bloco(demandas: List[int], S0: int, bloco: List[DPParams],
+                       T: int, Qmax: int, Smax: int) -> List[DpResult]:
+    K = len(bloco)
+    c = np.array([pr.c for pr in bloco], dtype=np.int64)[:, None]
+    h = np.array([pr.h for pr in bloco], dtype=np.int64)[:, None]
+    p = np.array([pr.p for pr in bloco], dtype=np.int64)[:, None]
+    q = np.arange(Qmax+1, dtype=np.int64)
+    y = np.arange(Smax+1, dtype=np.int64)
+    estoque_apos_compra = np.minimum(y[:, None] + q, Smax)  # (S+1, Q+1)
+    custo_compra = (c * q)[:, None, :]  # (K, 1, Q+1)
+
+    V = np.zeros((K, Smax+1), dtype=np.int64)
+    PI = np.empty((T, K, Smax+1), dtype=_dtype_politica(Qmax))
+    for t in range(T-1, -1, -1):
+        d = demandas[t]
+        # o custo após a compra só depende de y = min(s+q, Smax): calcula por y
+        # e espalha no plano (s, q) com um único gather
+        s_prime = np.maximum(0, y - d)
+        G = h*s_prime + p*np.maximum(0, d - y) + V[:, s_prime]  # (K, S+1)
+        total = G[:, estoque_apos_compra]  # (K, S+1, Q+1)
+        total += custo_compra
+        qt = total.argmin(axis=2)
+        PI[t] = qt
+        V = np.take_along_axis(total, qt[:, :, None], axis=2)[:, :, 0]
+
+    s0 = min(S0, Smax)
+    custos = V[:, s0]
+    polit = np.empty((K, T), dtype=np.int64)
+    traj = np.empty((K, T+1), dtype=np.int64)
+    s = np.full(K, s0, dtype=np.int64)
+    traj[:, 0] = s
+    for t in range(T):
+        qt = PI[t, np.arange(K), s].astype(np.int64)
+        polit[:, t] = qt
+        s = np.maximum(0, np.minimum(s + qt, Smax) - demandas[t])
+        traj[:, t+1] = s
+    return [DpResult(custo_total=int(custos[k]), politica=polit[k].tolist(),
+                     trajetoria_estoque=traj[k].tolist()) for k in range(K)]
+
+
+def dp_bottomup_np(demandas: List[int], S0: int, params: DPParams) -> DpResult:
+    return dp_bottomup_lote(demandas, S0, [params])[0]
+
+
+def grade_parametros(cs: List[int], hs: List[int], ps: List[int],
+                     Qmax: int, Smax: int) -> List[DPParams]:
+    return [DPParams(c=c, h=h, p=p, Qmax=Qmax, Smax=Smax) for c in cs for h in hs for p in ps]
+
 # -------- Utilidades para preparar demandas a partir da simulação ---------------
 
 def demandas_por_dia(registros: List[Consumo]) -> List[int]:
-    if not registros: return []
-    by_day: Dict[date, int] = {}
-    for r in registros:
-        by_day[r.data] = by_day.get(r.data, 0) + r.quantidade_consumida
-    dias = sorted(by_day.keys())
-    return [by_day[d] for d in dias]
+    # calendário denso do primeiro ao último dia (dias sem consumo = 0)
+    ag = AgregadorDemanda()
+    ag.estender(registros)
+    return ag.demandas()
+
+# -------- PD por item (SKU), em paralelo ----------------------------------------
+# Em vez do estoque consolidado, cada par (setor, item) vira um problema de PD
+# próprio: demanda diária do item (0 nos dias sem consumo, no mesmo calendário
+# de todos os registros), S0 = quantidade atual do item e c proporcional ao
+# valor_unitario. Os custos ficam em centavos para continuarem inteiros:
+#   c = round(params.c * valor_unitario * 100), h = params.h*100, p = params.p*100
+# (um item de R$ 1,00 reproduz os parâmetros globais).
+# Cada SKU é independente, então os problemas são distribuídos num pool de
+# processos; o resultado é o mesmo em série ou em paralelo.
+
+@dataclass
+class PlanoSKU:
+    setor: str
+    item: str
+    S0: int
+    params: DPParams
+    demandas: List[int]
+    resultado: DpResult
+
+
+def demandas_por_sku(registros: List[Consumo]) -> Dict[Tuple[str, str], List[int]]:
+    ag = AgregadorDemanda()
+    ag.estender(registros)
+    return ag.demandas_por_sku()
+
+
+def params_sku(dados: dict, params: DPParams) -> DPParams:
+    return DPParams(c=round(params.c * dados["valor_unitario"] * 100),
+                    h=params.h*100, p=params.p*100, Qmax=params.Qmax, Smax=params.Smax)
+
+
+def _resolver_sku(tarefa: Tuple[str, str, List[int], int, DPParams]) -> DpResult:
+    _, _, dmd, S0, pr = tarefa
+    return dp_sliding_window(dmd, S0=S0, params=pr)
+
+
+def otimizar_por_sku(estoque_snapshot: dict, registros: Any, params: DPParams,
+                     max_workers: Optional[int] = None, paralelo: bool = True) -> List[PlanoSKU]:
+    # registros: lista de Consumo ou um AgregadorDemanda já alimentado
+    agregador = registros if isinstance(registros, AgregadorDemanda) else None
+    por_sku = agregador.demandas_por_sku() if agregador else demandas_por_sku(registros)
+    T = len(agregador.demandas()) if agregador else len(next(iter(por_sku.values()), []))
+    tarefas = []
+    for setor, itens in estoque_snapshot.items():
+        for item, dados in itens.items():
+            dmd = por_sku.get((setor, item), [0]*T)
+            S0 = min(max(dados["quantidade"], 0), params.Smax)
+            tarefas.append((setor, item, dmd, S0, params_sku(dados, params)))
+    if paralelo and len(tarefas) > 1 and max_workers != 1:
+        workers = max_workers or os.cpu_count() or 1
+        lote = max(1, len(tarefas) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = list(pool.map(_resolver_sku, tarefas, chunksize=lote))
+    else:
+        resultados = [_resolver_sku(t) for t in tarefas]
+    return [PlanoSKU(setor=t[0], item=t[1], S0=t[3], params=t[4], demandas=t[2], resultado=r)
+            for t, r in zip(tarefas, resultados)]
+
+
+def linhas_planos_sku(planos: Iterable[PlanoSKU]) -> Iterator[str]:
+    yield "=== POLÍTICA ÓTIMA POR ITEM (custos em centavos) ===\n"
+    for pl in planos:
+        yield (f"{pl.item} no setor {pl.setor}: S0={pl.S0} | c={pl.params.c} | "
+               f"custo={pl.resultado.custo_total} | q_t={pl.resultado.politica}")
+
+
+def tabela_planos_sku(planos: List[PlanoSKU]) -> str:
+    return "\n".join(linhas_planos_sku(planos))
 
 # =============================================================================
 # RELATÓRIO AMPLIADO
@@ -263,95 +2252,145 @@ def demandas_por_dia(registros: List[Consumo]) -> List[int]:
 RELATORIO_PATH = "relatorio_dynamic_programming.txt"
 
 
-def calcular_valores(estoque_snapshot: dict) -> str:
-    out = ["=== VALOR ATUAL E IDEAL POR SETOR E PRODUTO ===\n"]
+def _texto_formulacao_pd(dp_td: DpResult, dp_bu: DpResult, params: DPParams,
+                         dp_sw: Optional[DpResult]) -> str:
+    iguais = mesmo_resultado(dp_td, dp_bu) and (dp_sw is None or mesmo_resultado(dp_td, dp_sw))
+    return textwrap.dedent(
+            f"""
+            • Estado: (t, s) — dia t e estoque s.\n
+            • Decisão: q_t em [0, {params.Qmax}] (unidades a repor no início do dia).\n
+            • Transição: s' = max(0, s + q_t − demanda[t]).\n              Falta = max(0, demanda[t] − (s + q_t)).\n
+            • Função objetivo: minimizar ∑(c*q_t + h*s' + p*Falta).\n              Parâmetros usados: c={params.c}, h={params.h}, p={params.p}.\n
+            • Implementações: Recursiva com memoização (top‑down), Iterativa (bottom‑up){" e Janela deslizante O(T·Smax)" if dp_sw else ""}.\n              Todas produziram o mesmo resultado? {"Sim" if iguais else "Não"}.\n            • Custo mínimo encontrado: {dp_td.custo_total}.\n            • Política ótima de pedidos (q_t): {dp_td.politica}.\n            • Trajetória de estoque: {dp_td.trajetoria_estoque}.
+            """
+    ).strip()+"\n"
+
+
+# -------- Geração em streaming com cache por seção ------------------------------
+# O relatório é escrito no arquivo seção a seção, à medida que cada pedaço é
+# produzido (sem montar o texto inteiro em memória). O estoque é percorrido uma
+# única vez para valores, faltas e sobras. Cada seção tem uma impressão digital
+# das suas entradas; se ela não mudou desde a última geração, o texto é copiado
+# do cache em disco (<relatório>.secoes/) em vez de ser renderizado de novo.
+# O texto final é idêntico ao da versão que montava a lista de linhas.
+
+def _secao_estoque(estoque_snapshot: dict) -> Iterator[str]:
+    yield "\n\n## Estoque (snapshot após simulação)\n"
+    yield "\n=== VALOR ATUAL E IDEAL POR SETOR E PRODUTO ===\n"
+    faltas, sobras = [], []
     for setor, itens in estoque_snapshot.items():
         valor_atual_setor = 0.0
         valor_ideal_setor = 0.0
-        out.append(f"Setor: {setor}")
+        yield f"\nSetor: {setor}"
         for item, dados in itens.items():
-            valor_atual = dados["quantidade"] * dados["valor_unitario"]
-            valor_ideal = dados["ideal"] * dados["valor_unitario"]
+            qtd, ideal, unit = dados["quantidade"], dados["ideal"], dados["valor_unitario"]
+            valor_atual = qtd * unit
+            valor_ideal = ideal * unit
             valor_atual_setor += valor_atual
             valor_ideal_setor += valor_ideal
-            out.append(
-                f"  Produto: {item}\n"
-                f"    Quantidade atual: {dados['quantidade']} x R$ {dados['valor_unitario']:.2f} = R$ {valor_atual:.2f}\n"
-                f"    Quantidade ideal: {dados['ideal']} x R$ {dados['valor_unitario']:.2f} = R$ {valor_ideal:.2f}\n"
+            yield (
+                f"\n  Produto: {item}\n"
+                f"    Quantidade atual: {qtd} x R$ {unit:.2f} = R$ {valor_atual:.2f}\n"
+                f"    Quantidade ideal: {ideal} x R$ {unit:.2f} = R$ {valor_ideal:.2f}\n"
             )
-        out.append(f"  Valor total atual do setor: R$ {valor_atual_setor:.2f}")
-        out.append(f"  Valor total ideal do setor: R$ {valor_ideal_setor:.2f}\n")
-    return "\n".join(out)
+            if qtd < ideal:
+                faltas.append(f"\n{item} no setor {setor}: falta {ideal - qtd} unidades")
+            elif qtd > ideal:
+                sobras.append(f"\n{item} no setor {setor}: sobrando {qtd - ideal} unidades")
+        yield f"\n  Valor total atual do setor: R$ {valor_atual_setor:.2f}"
+        yield f"\n  Valor total ideal do setor: R$ {valor_ideal_setor:.2f}\n"
+    yield "\n=== PRODUTOS EM FALTA ===\n"
+    yield from faltas
+    yield "\n=== PRODUTOS SOBRANDO ===\n"
+    yield from sobras
 
 
-def produtos_em_falta(estoque_snapshot: dict) -> str:
-    out = ["=== PRODUTOS EM FALTA ===\n"]
-    for setor, itens in estoque_snapshot.items():
-        for item, dados in itens.items():
-            if dados["quantidade"] < dados["ideal"]:
-                falta = dados["ideal"] - dados["quantidade"]
-                out.append(f"{item} no setor {setor}: falta {falta} unidades")
-    return "\n".join(out)
+def _secao_planos_sku(planos: List[PlanoSKU]) -> Iterator[str]:
+    yield "\n\n## Programação Dinâmica — Política por item\n"
+    for linha in linhas_planos_sku(planos):
+        yield "\n" + linha
 
 
-def produtos_sobrando(estoque_snapshot: dict) -> str:
-    out = ["=== PRODUTOS SOBRANDO ===\n"]
-    for setor, itens in estoque_snapshot.items():
-        for item, dados in itens.items():
-            if dados["quantidade"] > dados["ideal"]:
-                sobra = dados["quantidade"] - dados["ideal"]
-                out.append(f"{item} no setor {setor}: sobrando {sobra} unidades")
-    return "\n".join(out)
+def _impressao(partes: Iterable[Any]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        h.update(repr(parte).encode())
+    return h.digest()
+
+
+class GeradorRelatorio:
+    def __init__(self, caminho: str = RELATORIO_PATH):
+        self.caminho = caminho
+        self.pasta_secoes = caminho + ".secoes"
+        self._impressoes: Dict[str, bytes] = {}
+        self.renderizadas: List[str] = []  # seções refeitas na última geração
+
+    def _secao(self, f, nome: str, impressao: bytes, render: Callable[[], Iterable[str]]):
+        cache = os.path.join(self.pasta_secoes, nome + ".txt")
+        if self._impressoes.get(nome) == impressao and os.path.exists(cache):
+            with open(cache, encoding="utf-8") as origem:
+                shutil.copyfileobj(origem, f)
+            return
+        with open(cache, "w", encoding="utf-8") as copia:
+            for parte in render():
+                f.write(parte)
+                copia.write(parte)
+        self._impressoes[nome] = impressao
+        self.renderizadas.append(nome)
+
+    def gerar(self, estoque_snapshot: dict, registros: List[Consumo],
+              dp_td: Optional[DpResult] = None, dp_bu: Optional[DpResult] = None,
+              params: Optional[DPParams] = None, dp_sw: Optional[DpResult] = None,
+              planos_sku: Optional[List[PlanoSKU]] = None) -> str:
+        os.makedirs(self.pasta_secoes, exist_ok=True)
+        self.renderizadas = []
+        with open(self.caminho, "w", encoding="utf-8") as f:
+            self._secao(f, "objetivo", b"", lambda: (
+                "# RELATÓRIO — Sprint 3 (Dynamic Programming)\n", "\n## Objetivo\n\n",
+                textwrap.dedent(
+                    """
+                    Organizar e consultar os dados de consumo com estruturas clássicas e
+                    modelar a reposição via Programação Dinâmica para reduzir faltas e
+                    desperdícios, garantindo visão de consumo e política ótima de compra.
+                    """
+                ).strip()+"\n"))
+            self._secao(f, "estoque", _impressao(
+                (setor, [(item, d["quantidade"], d["ideal"], d["valor_unitario"]) for item, d in itens.items()])
+                for setor, itens in estoque_snapshot.items()),
+                lambda: _secao_estoque(estoque_snapshot))
+            if dp_td and dp_bu and params:
+                resultados = [(r.custo_total, r.politica, r.trajetoria_estoque)
+                              for r in (dp_td, dp_bu, dp_sw) if r]
+                self._secao(f, "pd", _impressao((astuple(params), dp_sw is not None, resultados)),
+                            lambda: ("\n\n## Programação Dinâmica — Formulação\n\n",
+                                     _texto_formulacao_pd(dp_td, dp_bu, params, dp_sw)))
+            if planos_sku:
+                self._secao(f, "planos_sku", _impressao(
+                    (pl.setor, pl.item, pl.S0, pl.params.c, pl.resultado.custo_total, pl.resultado.politica)
+                    for pl in planos_sku), lambda: _secao_planos_sku(planos_sku))
+            self._secao(f, "como_executar", b"", lambda: (
+                "\n\n## Como executar\n\n",
+                textwrap.dedent(
+                    """
+                    1. Execute `python sprint.py`.
+                    2. Pelo menu, use: (1) Simular, (2) Fila, (3) Pilha, (4) Buscar,
+                       (5) Ordenar, (6) Relatório, (7) Otimizar Reposição (PD).
+                    3. O relatório é salvo como `relatorio_dynamic_programming.txt`.
+                    """
+                ).strip()+"\n"))
+        return os.path.abspath(self.caminho)
+
+
+GERADOR_RELATORIO = GeradorRelatorio()
 
 
 def gerar_relatorio(estoque_snapshot: dict, registros: List[Consumo],
                     dp_td: Optional[DpResult] = None,
                     dp_bu: Optional[DpResult] = None,
-                    params: Optional[DPParams] = None) -> str:
-    linhas = []
-    linhas.append("# RELATÓRIO — Sprint 3 (Dynamic Programming)\n")
-
-    linhas.append("## Objetivo\n")
-    linhas.append(textwrap.dedent(
-        """
-        Organizar e consultar os dados de consumo com estruturas clássicas e
-        modelar a reposição via Programação Dinâmica para reduzir faltas e
-        desperdícios, garantindo visão de consumo e política ótima de compra.
-        """
-    ).strip()+"\n")
-
-    linhas.append("\n## Estoque (snapshot após simulação)\n")
-    linhas.append(calcular_valores(estoque_snapshot))
-    linhas.append(produtos_em_falta(estoque_snapshot))
-    linhas.append(produtos_sobrando(estoque_snapshot))
-
-    if dp_td and dp_bu and params:
-        iguais = (dp_td.custo_total == dp_bu.custo_total and dp_td.politica == dp_bu.politica)
-        linhas.append("\n## Programação Dinâmica — Formulação\n")
-        linhas.append(textwrap.dedent(
-            f"""
-            • Estado: (t, s) — dia t e estoque s.\n
-            • Decisão: q_t em [0, {params.Qmax}] (unidades a repor no início do dia).\n
-            • Transição: s' = max(0, s + q_t − demanda[t]).\n              Falta = max(0, demanda[t] − (s + q_t)).\n
-            • Função objetivo: minimizar ∑(c*q_t + h*s' + p*Falta).\n              Parâmetros usados: c={params.c}, h={params.h}, p={params.p}.\n
-            • Implementações: Recursiva com memoização (top‑down) e Iterativa (bottom‑up).\n              Ambas produziram o mesmo resultado? {"Sim" if iguais else "Não"}.\n            • Custo mínimo encontrado: {dp_td.custo_total}.\n            • Política ótima de pedidos (q_t): {dp_td.politica}.\n            • Trajetória de estoque: {dp_td.trajetoria_estoque}.
-            """
-        ).strip()+"\n")
-
-    linhas.append("\n## Como executar\n")
-    linhas.append(textwrap.dedent(
-        """
-        1. Execute `python sprint.py`.
-        2. Pelo menu, use: (1) Simular, (2) Fila, (3) Pilha, (4) Buscar,
-           (5) Ordenar, (6) Relatório, (7) Otimizar Reposição (PD).
-        3. O relatório é salvo como `relatorio_dynamic_programming.txt`.
-        """
-    ).strip()+"\n")
-
-    conteudo = "\n".join(linhas)
-    with open(RELATORIO_PATH, "w", encoding="utf-8") as f:
-        f.write(conteudo)
-    return os.path.abspath(RELATORIO_PATH)
+                    params: Optional[DPParams] = None,
+                    dp_sw: Optional[DpResult] = None,
+                    planos_sku: Optional[List[PlanoSKU]] = None) -> str:
+    return GERADOR_RELATORIO.gerar(estoque_snapshot, registros, dp_td, dp_bu, params, dp_sw, planos_sku)
 
 # =============================================================================
 # MENU / ORQUESTRAÇÃO
@@ -359,6 +2398,31 @@ def gerar_relatorio(estoque_snapshot: dict, registros: List[Consumo],
 
 REGISTROS: List[Consumo] = []
 DP_PARAMS = DPParams()  # pode ajustar no menu
+PLANOS_SKU: List[PlanoSKU] = []  # última otimização por item (opção 10)
+STORE = ConsumoStore()  # mesmos registros de REGISTROS, em colunas indexadas
+INDICE = IndiceBusca(STORE)  # índice de busca por item sobre o STORE (opção 4)
+AGREGADOR = AgregadorDemanda()  # demanda diária acumulada (opções 6, 7 e 9)
+PIPELINE = PipelineIngestao(REGISTROS, STORE, AGREGADOR)
+LOG_PATH = "consumo_log"
+LOG_PENDENTE: Optional[LeitorLog] = None  # log carregado (opção 12) ainda sem registros Consumo
+
+
+def _materializar_log():
+    # o log carregado alimenta a PD direto das colunas (AgregadorDemanda.de_log);
+    # os Consumo só são criados quando uma opção precisa deles (2–5, 11 e 12)
+    global LOG_PENDENTE
+    if LOG_PENDENTE is None:
+        return
+    with LOG_PENDENTE as log:
+        PipelineIngestao(REGISTROS, STORE).ingerir_lote(log)
+    LOG_PENDENTE = None
+
+
+def _descartar_log():
+    global LOG_PENDENTE
+    if LOG_PENDENTE is not None:
+        LOG_PENDENTE.fechar()
+        LOG_PENDENTE = None
 
 
 def _menu():
@@ -366,11 +2430,15 @@ def _menu():
     print("1) Simular consumo (gera registros)")
     print("2) Ver Fila (FIFO)")
     print("3) Ver Pilha (LIFO)")
-    print("4) Buscar item (Sequencial/Binária)")
+    print("4) Buscar item (Sequencial/Índice)")
     print("5) Ordenar (quantidade/validade)")
     print("6) Gerar Relatório")
     print("7) Otimizar Reposição (Programação Dinâmica)")
     print("8) Ajustar Parâmetros da PD (c,h,p,Qmax,Smax)")
+    print("9) Varredura de parâmetros (c,h,p) — NumPy em lote")
+    print("10) Otimizar Reposição por item (PD por SKU, paralelo)")
+    print("11) Importar consumo de arquivo CSV (acrescenta aos registros)")
+    print("12) Histórico em disco (gravar/carregar)")
     print("0) Sair")
 
 
@@ -389,80 +2457,90 @@ if __name__ == "__main__":
                 seed = int(input("Semente aleatória? [42]: ") or 42)
             except ValueError:
                 dias, seed = 7, 42
-            REGISTROS = simular_consumo(estoque, dias=dias, semente=seed)
-            print(f"Gerados {len(REGISTROS)} registros.")
+            _descartar_log()
+            REGISTROS, STORE, AGREGADOR = [], ConsumoStore(), AgregadorDemanda()
+            INDICE = IndiceBusca(STORE)
+            PLANOS_SKU = []
+            PIPELINE = PipelineIngestao(REGISTROS, STORE, AGREGADOR)
+            n = PIPELINE.ingerir_lote(simular_consumo_stream(estoque, dias=dias, semente=seed))
+            print(f"Gerados {n} registros.")
             _pause()
 
         elif op == "2":
-            if not REGISTROS: print("Simule primeiro."); _pause(); continue
-            fila = FilaConsumo(); [fila.enfileirar(r) for r in REGISTROS]
+            if not AGREGADOR.n_registros: print("Simule primeiro."); _pause(); continue
+            _materializar_log()
             print("— Fila (10 primeiros) —")
-            for r in fila.listar()[:10]: print(r)
+            for r in STORE.fila()[:10]: print(r)
             _pause()
 
         elif op == "3":
-            if not REGISTROS: print("Simule primeiro."); _pause(); continue
-            pilha = PilhaConsumo(); [pilha.empilhar(r) for r in REGISTROS]
+            if not AGREGADOR.n_registros: print("Simule primeiro."); _pause(); continue
+            _materializar_log()
             print("— Pilha (10 primeiros) —")
-            for r in pilha.listar()[:10]: print(r)
+            for r in STORE.pilha()[:10]: print(r)
             _pause()
 
         elif op == "4":
-            if not REGISTROS: print("Simule primeiro."); _pause(); continue
+            if not AGREGADOR.n_registros: print("Simule primeiro."); _pause(); continue
+            _materializar_log()
             alvo = input("Item para buscar [Reagentes]: ") or "Reagentes"
-            seq = [r for r in REGISTROS if r.item.lower()==alvo.lower()]
-            regs_item = merge_sort(REGISTROS, key=lambda r: r.item.lower())
-            # busca binária simples por fatia
-            lo, hi = 0, len(regs_item)-1; pos=-1
-            while lo<=hi:
-                mid=(lo+hi)//2; m=regs_item[mid].item.lower()
-                if m==alvo.lower(): pos=mid; break
-                if m<alvo.lower(): lo=mid+1
-                else: hi=mid-1
-            bin_=[]
-            if pos!=-1:
-                i=pos
-                while i>=0 and regs_item[i].item.lower()==alvo.lower(): bin_.append(regs_item[i]); i-=1
-                j=pos+1
-                while j<len(regs_item) and regs_item[j].item.lower()==alvo.lower(): bin_.append(regs_item[j]); j+=1
-            print(f"Sequencial: {len(seq)} | Binária: {len(bin_)}")
-            for r in seq[:5]: print(r)
+            modo = {"1": "sem_caixa", "2": "exato", "3": "prefixo"}.get(
+                input("Modo: 1) sem caixa 2) exato 3) prefixo [1]: ").strip() or "1", "sem_caixa")
+            seq = busca_sequencial(REGISTROS, alvo, modo)
+            idx = INDICE.buscar(alvo, modo)
+            print(f"Sequencial: {len(seq)} | Índice: {len(idx)} | "
+                  f"Conferência: {'OK' if seq == idx else 'DIFERENTE'}")
+            for r in idx[:5]: print(r)
             _pause()
 
         elif op == "5":
-            if not REGISTROS: print("Simule primeiro."); _pause(); continue
-            print("1) MergeSort por quantidade (asc)\n2) QuickSort por quantidade (desc)\n3) MergeSort por validade (asc)")
+            if not AGREGADOR.n_registros: print("Simule primeiro."); _pause(); continue
+            _materializar_log()
+            print("1) Por quantidade (asc)\n2) Por quantidade (desc)\n3) Por validade (asc)")
             s = input("> ").strip() or "1"
-            if s=="1": ordenados = merge_sort(REGISTROS, key=lambda r: r.quantidade_consumida)
-            elif s=="2": ordenados = list(reversed(quick_sort(REGISTROS, key=lambda r: r.quantidade_consumida)))
-            else: ordenados = merge_sort(REGISTROS, key=lambda r: r.validade)
-            for r in ordenados[:10]: print(r)
+            if s=="1": ordenados = top_k(REGISTROS, key=lambda r: r.quantidade_consumida, k=10)
+            elif s=="2": ordenados = top_k(REGISTROS, key=lambda r: r.quantidade_consumida, k=10, reverse=True)
+            else: ordenados = top_k(REGISTROS, key=lambda r: r.validade, k=10)
+            for r in ordenados: print(r)
             _pause()
 
         elif op == "6":
-            if not REGISTROS: print("Simule primeiro."); _pause(); continue
+            if not AGREGADOR.n_registros: print("Simule primeiro."); _pause(); continue
             # Se já houver resultado de PD, vamos computar aqui para cair no relatório
-            dmd = demandas_por_dia(REGISTROS)
+            dmd = AGREGADOR.demandas()
             S0 = sum(v["quantidade"] for setor in estoque.values() for v in setor.values())
-            td = dp_topdown(dmd, S0=min(S0, DP_PARAMS.Smax), params=DP_PARAMS) if dmd else None
-            bu = dp_bottomup(dmd, S0=min(S0, DP_PARAMS.Smax), params=DP_PARAMS) if dmd else None
-            path = gerar_relatorio(estoque, REGISTROS, td, bu, DP_PARAMS)
+            td = MEMO_PD.obter(dp_topdown, dmd, min(S0, DP_PARAMS.Smax), DP_PARAMS) if dmd else None
+            bu = MEMO_PD.obter(dp_bottomup, dmd, min(S0, DP_PARAMS.Smax), DP_PARAMS) if dmd else None
+            sw = dp_cached(dmd, S0=min(S0, DP_PARAMS.Smax), params=DP_PARAMS) if dmd else None
+            path = gerar_relatorio(estoque, REGISTROS, td, bu, DP_PARAMS, sw, PLANOS_SKU)
             print(f"Relatório gerado em: {path}")
             _pause()
 
         elif op == "7":
-            if not REGISTROS: print("Simule primeiro."); _pause(); continue
-            dmd = demandas_por_dia(REGISTROS)
+            if not AGREGADOR.n_registros: print("Simule primeiro."); _pause(); continue
+            dmd = AGREGADOR.demandas()
             if not dmd: print("Sem demandas."); _pause(); continue
             S0 = sum(v["quantidade"] for setor in estoque.values() for v in setor.values())
             S0 = min(S0, DP_PARAMS.Smax)
-            td = dp_topdown(dmd, S0=S0, params=DP_PARAMS)
-            bu = dp_bottomup(dmd, S0=S0, params=DP_PARAMS)
+            td = MEMO_PD.obter(dp_topdown, dmd, S0, DP_PARAMS)
+            bu = MEMO_PD.obter(dp_bottomup, dmd, S0, DP_PARAMS)
+            sw = dp_cached(dmd, S0=S0, params=DP_PARAMS)
+            it = MEMO_PD.obter(dp_topdown_iterativo, dmd, S0, DP_PARAMS)
             print("— Programação Dinâmica —")
             print(f"Top‑down custo: {td.custo_total}\nPolítica: {td.politica}")
             print(f"Bottom‑up custo: {bu.custo_total}\nPolítica: {bu.politica}")
-            iguais = (td.custo_total==bu.custo_total and td.politica==bu.politica)
-            print("Equivalência (custo e política):", "OK" if iguais else "DIFERENTE")
+            print(f"Janela deslizante custo: {sw.custo_total}\nPolítica: {sw.politica}")
+            print(f"Top‑down iterativo: {it.estados_avaliados} estados avaliados "
+                  f"(cache hits={it.cache_hits}, misses={it.cache_misses})")
+            print(f"Cache de linhas (janela deslizante): {sw.cache_hits} reaproveitadas, "
+                  f"{sw.cache_misses} calculadas | taxa de acerto global {CACHE_PD.taxa_acerto():.0%}")
+            print(f"Resultados de PD reaproveitados entre opções: {MEMO_PD.hits} (resolvidos: {MEMO_PD.misses})")
+            bs, pol = dp_politica_base_stock(dmd, S0=S0, params=DP_PARAMS)
+            print(f"Política base-stock (s_t, S_t): {list(zip(pol.ponto_pedido, pol.nivel_alvo))}"
+                  f" | {pol.bytes_usados()} bytes, {len(pol.linhas_fallback)} dia(s) com tabela completa")
+            iguais = (mesmo_resultado(td, bu) and mesmo_resultado(td, sw) and mesmo_resultado(td, it)
+                      and mesmo_resultado(td, bs))
+            print("Equivalência (custo, política e trajetória):", "OK" if iguais else "DIFERENTE")
             _pause()
 
         elif op == "8":
@@ -478,6 +2556,70 @@ if __name__ == "__main__":
                 print("Parâmetros mantidos.")
             _pause()
 
+        elif op == "9":
+            if not AGREGADOR.n_registros: print("Simule primeiro."); _pause(); continue
+            dmd = AGREGADOR.demandas()
+            if not dmd: print("Sem demandas."); _pause(); continue
+            try:
+                cs = [int(x) for x in (input(f"valores de c [ {DP_PARAMS.c} ]: ") or str(DP_PARAMS.c)).split(",")]
+                hs = [int(x) for x in (input(f"valores de h [ {DP_PARAMS.h} ]: ") or str(DP_PARAMS.h)).split(",")]
+                ps = [int(x) for x in (input(f"valores de p [ {DP_PARAMS.p} ]: ") or str(DP_PARAMS.p)).split(",")]
+            except ValueError:
+                print("Valores inválidos (use inteiros separados por vírgula)."); _pause(); continue
+            S0 = sum(v["quantidade"] for setor in estoque.values() for v in setor.values())
+            grade = grade_parametros(cs, hs, ps, DP_PARAMS.Qmax, DP_PARAMS.Smax)
+            try:
+                res = dp_bottomup_lote(dmd, S0=min(S0, DP_PARAMS.Smax), lote=grade)
+            except RuntimeError as e:
+                print(e); _pause(); continue
+            print(f"— {len(grade)} combinações (10 menores custos) —")
+            for pr, r in sorted(zip(grade, res), key=lambda x: x[1].custo_total)[:10]:
+                print(f"c={pr.c} h={pr.h} p={pr.p} | custo={r.custo_total} | política={r.politica}")
+            _pause()
+
+        elif op == "10":
+            if not AGREGADOR.n_registros: print("Simule primeiro."); _pause(); continue
+            PLANOS_SKU = otimizar_por_sku(estoque, AGREGADOR, DP_PARAMS)
+            print(tabela_planos_sku(PLANOS_SKU))
+            _pause()
+
+        elif op == "11":
+            caminho = input("Arquivo CSV (data;setor;item;quantidade_consumida;validade): ").strip()
+            _materializar_log()
+            try:
+                n = PIPELINE.ingerir_lote(ler_consumos_csv(caminho))
+            except (OSError, KeyError, ValueError) as e:
+                print(f"Falha ao importar: {e}"); _pause(); continue
+            PLANOS_SKU = []
+            print(f"Importados {n} registros (total {AGREGADOR.n_registros}).")
+            _pause()
+
+        elif op == "12":
+            acao = input(f"g) gravar registros atuais em '{LOG_PATH}' (substitui)  c) carregar [c]: ").strip() or "c"
+            if acao == "g":
+                if not AGREGADOR.n_registros: print("Simule primeiro."); _pause(); continue
+                _materializar_log()
+                shutil.rmtree(LOG_PATH, ignore_errors=True)
+                with LogConsumo(LOG_PATH) as log:
+                    log.estender(REGISTROS)
+                print(f"Gravados {len(REGISTROS)} registros em {os.path.abspath(LOG_PATH)}.")
+            else:
+                try:
+                    log = LeitorLog(LOG_PATH)
+                except (OSError, ValueError) as e:
+                    print(f"Falha ao carregar: {e}"); _pause(); continue
+                _descartar_log()
+                # demanda (opções 6, 7, 9 e 10) sai das colunas do log; os registros
+                # Consumo ficam para quando as opções 2–5 pedirem (_materializar_log)
+                REGISTROS, STORE = [], ConsumoStore()
+                INDICE = IndiceBusca(STORE)
+                AGREGADOR = AgregadorDemanda.de_log(log)
+                PIPELINE = PipelineIngestao(REGISTROS, STORE, AGREGADOR)
+                LOG_PENDENTE = log
+                PLANOS_SKU = []
+                print(f"Carregados {len(log)} registros.")
+            _pause()
+
         elif op == "0":
             break
         else: